@@ -0,0 +1,164 @@
+import collections
+import random
+import sqlite3
+from typing import Any, Callable, List, NamedTuple, Optional
+from oopdb.OOPDB import OOPDB, RowsStyle
+from oopdb.Expression import Expression, Operation
+
+GROUPS_COUNT = 100
+SINGLE_INSERTS_COUNT = 1000
+POINT_SELECTS_COUNT = 1000
+
+class Case(NamedTuple):
+    '''
+    Benchmark case that is measured through OOPDB and through hand-written sqlite3 code
+        name
+            Unique name of the case
+        ops
+            Returns count of operations done by one run for the given table size
+        run_oopdb
+            Runs the case with OOPDB, takes data base, table size and run id
+        run_sqlite3
+            Runs the same work with sqlite3 connection, takes connection, table size and run id
+        setup
+            Optional preparation that isn't measured, takes sqlite3 connection and table size
+    '''
+    name : str
+    ops : Callable[[int], int]
+    run_oopdb : Callable[[OOPDB, int, int], Any]
+    run_sqlite3 : Callable[[sqlite3.Connection, int, int], Any]
+    setup : Optional[Callable[[sqlite3.Connection, int], None]] = None
+
+def fill_data_base(connection : sqlite3.Connection, size : int) -> None:
+    '''
+    Creates tables Groups and Items with the given count of items, the same content is used for both implementations
+    '''
+    connection.execute("CREATE TABLE Groups (Id INTEGER PRIMARY KEY, Title TEXT NOT NULL)")
+    connection.execute("CREATE TABLE Items (Id INTEGER PRIMARY KEY, GroupId INTEGER NOT NULL, Name TEXT NOT NULL, Value INTEGER NOT NULL, Flag BOOL NOT NULL)")
+    connection.executemany("INSERT INTO Groups (Id, Title) VALUES (?, ?)",
+                           ((group_id, f"group{group_id}") for group_id in range(GROUPS_COUNT)))
+    connection.executemany("INSERT INTO Items (Id, GroupId, Name, Value, Flag) VALUES (?, ?, ?, ?, ?)",
+                           ((item_id, item_id % GROUPS_COUNT, f"item{item_id}", item_id * 7 % size, item_id % 2)
+                            for item_id in range(1, size + 1)))
+    connection.execute("CREATE INDEX Items_Value_index ON Items (Value)")
+    connection.commit()
+
+def _new_rows(size : int) -> List[tuple]:
+    return [(item_id % GROUPS_COUNT, f"new{item_id}", item_id, item_id % 2) for item_id in range(size)]
+
+def _create_new_items(connection : sqlite3.Connection, _ : int) -> None:
+    connection.execute("DROP TABLE IF EXISTS NewItems")
+    connection.execute("CREATE TABLE NewItems (Id INTEGER PRIMARY KEY, GroupId INTEGER, Name TEXT, Value INTEGER, Flag BOOL)")
+    connection.commit()
+
+NEW_ITEM_COLUMNS = ["GroupId", "Name", "Value", "Flag"]
+INSERT_NEW_ITEM = "INSERT INTO NewItems (GroupId, Name, Value, Flag) VALUES (?, ?, ?, ?)"
+
+def _single_inserts_oopdb(db : OOPDB, size : int, _ : int) -> None:
+    for row in _new_rows(min(size, SINGLE_INSERTS_COUNT)):
+        db.insert_into("NewItems", NEW_ITEM_COLUMNS, list(row)).execute()
+
+def _single_inserts_sqlite3(connection : sqlite3.Connection, size : int, _ : int) -> None:
+    for row in _new_rows(min(size, SINGLE_INSERTS_COUNT)):
+        connection.execute(INSERT_NEW_ITEM, row)
+        connection.commit()
+
+def _bulk_insert_oopdb(db : OOPDB, size : int, _ : int) -> None:
+    db.insert_many("NewItems", NEW_ITEM_COLUMNS, _new_rows(size))
+
+def _bulk_insert_sqlite3(connection : sqlite3.Connection, size : int, _ : int) -> None:
+    connection.executemany(INSERT_NEW_ITEM, _new_rows(size))
+    connection.commit()
+
+def _point_ids(size : int, run_id : int) -> List[int]:
+    generator = random.Random(run_id)
+    return [generator.randint(1, size) for _ in range(min(size, POINT_SELECTS_COUNT))]
+
+def _point_selects_oopdb(db : OOPDB, size : int, run_id : int) -> None:
+    for item_id in _point_ids(size, run_id):
+        db.select("Items").where(Expression("Id", Operation.EQUAL, item_id)).fetch()
+
+def _point_selects_sqlite3(connection : sqlite3.Connection, size : int, run_id : int) -> None:
+    for item_id in _point_ids(size, run_id):
+        connection.execute("SELECT * FROM Items WHERE Id = ?", (item_id,)).fetchall()
+
+def _range_bounds(size : int, run_id : int) -> tuple:
+    # about 1% of rows, shifted for each run
+    width = max(size // 100, 1)
+    start = run_id * width % size
+    return (start, start + width - 1)
+
+def _range_select_oopdb(db : OOPDB, size : int, run_id : int) -> None:
+    db.select("Items").where(Expression("Value", Operation.BETWEEN, _range_bounds(size, run_id))).fetch()
+
+def _range_select_sqlite3(connection : sqlite3.Connection, size : int, run_id : int) -> None:
+    connection.execute("SELECT * FROM Items WHERE Value BETWEEN ? AND ?", _range_bounds(size, run_id)).fetchall()
+
+def _inner_join_oopdb(db : OOPDB, size : int, run_id : int) -> None:
+    db.select("Items", ["Items.Name", "Groups.Title"]).inner_join("Groups", "Items.GroupId", "Id")\
+      .where(Expression("Items.Value", Operation.BETWEEN, _range_bounds(size, run_id))).fetch()
+
+def _inner_join_sqlite3(connection : sqlite3.Connection, size : int, run_id : int) -> None:
+    connection.execute("SELECT Items.Name, Groups.Title FROM Items INNER JOIN Groups ON Items.GroupId = Groups.Id "
+                       "WHERE Items.Value BETWEEN ? AND ?", _range_bounds(size, run_id)).fetchall()
+
+def _select_count_oopdb(db : OOPDB, size : int, run_id : int) -> None:
+    db.select_count("Items").where(Expression("Flag", Operation.EQUAL, True)).fetch()
+
+def _select_count_sqlite3(connection : sqlite3.Connection, size : int, run_id : int) -> None:
+    connection.execute("SELECT COUNT(*) FROM Items WHERE Flag = ?", (1,)).fetchall()
+
+def _update_oopdb(db : OOPDB, size : int, run_id : int) -> None:
+    db.update("Items", ["Name"], [f"updated{run_id}"]).where(Expression("Value", Operation.BETWEEN, _range_bounds(size, run_id))).execute()
+
+def _update_sqlite3(connection : sqlite3.Connection, size : int, run_id : int) -> None:
+    connection.execute("UPDATE Items SET Name = ? WHERE Value BETWEEN ? AND ?", (f"updated{run_id}",) + _range_bounds(size, run_id))
+    connection.commit()
+
+def _delete_oopdb(db : OOPDB, size : int, run_id : int) -> None:
+    db.delete("Items").where(Expression("Value", Operation.BETWEEN, _range_bounds(size, run_id))).execute()
+
+def _delete_sqlite3(connection : sqlite3.Connection, size : int, run_id : int) -> None:
+    connection.execute("DELETE FROM Items WHERE Value BETWEEN ? AND ?", _range_bounds(size, run_id))
+    connection.commit()
+
+def _fetch_oopdb(rows_style : RowsStyle) -> Callable[[OOPDB, int, int], Any]:
+    return lambda db, size, run_id: db.select("Items").fetch(rows_style)
+
+def _fetch_sqlite3(rows_style : RowsStyle) -> Callable[[sqlite3.Connection, int, int], Any]:
+    def run(connection : sqlite3.Connection, size : int, run_id : int) -> Any:
+        cursor = connection.cursor()
+        if rows_style == RowsStyle.DICTIONARY:
+            cursor.row_factory = sqlite3.Row
+            return [dict(row) for row in cursor.execute("SELECT * FROM Items")]
+        cursor.execute("SELECT * FROM Items")
+        names = [description[0] for description in cursor.description]
+        if rows_style == RowsStyle.RECORD:
+            record = collections.namedtuple("Record", names)
+            return [record._make(row) for row in cursor]
+        if rows_style == RowsStyle.COLUMNS:
+            return dict(zip(names, (list(column) for column in zip(*cursor.fetchall()))))
+        return cursor.fetchall()
+    return run
+
+def _one(_ : int) -> int:
+    return 1
+
+def _range_size(size : int) -> int:
+    return max(size // 100, 1)
+
+# cases that modify the data base go after the reading ones, delete is the last one
+CASES = [
+    Case("single_insert", lambda size: min(size, SINGLE_INSERTS_COUNT), _single_inserts_oopdb, _single_inserts_sqlite3, _create_new_items),
+    Case("bulk_insert", lambda size: size, _bulk_insert_oopdb, _bulk_insert_sqlite3, _create_new_items),
+    Case("point_select", lambda size: min(size, POINT_SELECTS_COUNT), _point_selects_oopdb, _point_selects_sqlite3),
+    Case("range_select", _range_size, _range_select_oopdb, _range_select_sqlite3),
+    Case("inner_join", _range_size, _inner_join_oopdb, _inner_join_sqlite3),
+    Case("select_count", _one, _select_count_oopdb, _select_count_sqlite3),
+] + [
+    Case(f"fetch_{rows_style.name.lower()}", lambda size: size, _fetch_oopdb(rows_style), _fetch_sqlite3(rows_style))
+    for rows_style in RowsStyle
+] + [
+    Case("update", _range_size, _update_oopdb, _update_sqlite3),
+    Case("delete", _range_size, _delete_oopdb, _delete_sqlite3),
+]
@@ -0,0 +1,169 @@
+'''
+Runs benchmark cases through OOPDB and through hand-written sqlite3 code and saves results as JSON
+
+    python -m benchmarks.run --sizes 1000 100000 --repeat 5 --output results.json --baseline previous.json
+'''
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, List, Optional
+from oopdb.OOPDB import OOPDB
+from oopdb.Utils import print_table
+from .cases import CASES, Case, fill_data_base
+
+IMPLEMENTATIONS = ["sqlite3", "oopdb"]
+# both implementations use the same connection settings, so the difference is the wrapper overhead
+PRAGMAS = {"journal_mode" : "WAL", "synchronous" : "OFF"}
+
+def measure(function : Callable[[int], Any], repeat : int, warmup : int) -> List[float]:
+    '''
+    Returns durations of the repeated runs in seconds, warmup runs aren't measured
+
+    The function takes id of the run, ids are unique among all runs including warmup ones
+    '''
+    durations = []
+    for run_id in range(warmup + repeat):
+        gc.collect()
+        gc.disable()
+        start = time.perf_counter()
+        try:
+            function(run_id)
+        finally:
+            duration = time.perf_counter() - start
+            gc.enable()
+        if run_id >= warmup:
+            durations.append(duration)
+    return durations
+
+def run_size(size : int, cases : List[Case], repeat : int, warmup : int, directory : str) -> List[dict]:
+    '''
+    Runs all cases for the tables with the given count of rows, each implementation has its own data base file
+    '''
+    connections = {}
+    for implementation in IMPLEMENTATIONS:
+        path = os.path.join(directory, f"{implementation}_{size}.db")
+        connection = sqlite3.connect(path)
+        for pragma, value in PRAGMAS.items():
+            connection.execute(f"PRAGMA {pragma} = {value}")
+        fill_data_base(connection, size)
+        if implementation == "oopdb":
+            connection.close()
+            db = OOPDB().open(path, **PRAGMAS)
+            connections[implementation] = (db, db.connection)
+        else:
+            connections[implementation] = (connection, connection)
+
+    results = []
+    for case in cases:
+        for implementation in IMPLEMENTATIONS:
+            target, connection = connections[implementation]
+            if case.setup is not None:
+                case.setup(connection, size)
+            run = case.run_oopdb if implementation == "oopdb" else case.run_sqlite3
+            durations = measure(lambda run_id: run(target, size, run_id), repeat, warmup)
+            results.append({
+                "case" : case.name,
+                "size" : size,
+                "implementation" : implementation,
+                "ops" : case.ops(size),
+                "durations" : durations,
+                "min" : min(durations),
+                "median" : statistics.median(durations),
+                "mean" : statistics.mean(durations),
+            })
+            print(f"{case.name:>16} {size:>8} {implementation:>8} {results[-1]['median']:.6f} s", file=sys.stderr)
+
+    for target, _ in connections.values():
+        target.close()
+    return results
+
+def overheads(results : List[dict]) -> dict:
+    '''
+    Returns ratio of the OOPDB median to sqlite3 median for each (case, size)
+    '''
+    medians = {(result["case"], result["size"], result["implementation"]) : result["median"] for result in results}
+    ratios = {}
+    for (case, size, implementation), median in medians.items():
+        raw_median = medians.get((case, size, "sqlite3"))
+        if implementation == "oopdb" and raw_median:
+            ratios[(case, size)] = median / raw_median
+    return ratios
+
+def print_summary(results : List[dict]) -> None:
+    medians = {(result["case"], result["size"], result["implementation"]) : result["median"] for result in results}
+    rows = []
+    for (case, size), ratio in overheads(results).items():
+        rows.append((case, size, f"{medians[(case, size, 'sqlite3')]:.6f}", f"{medians[(case, size, 'oopdb')]:.6f}", f"{ratio:.2f}x"))
+    print_table(rows, ["Case", "Rows", "sqlite3, s", "oopdb, s", "Overhead"])
+
+def compare(baseline : dict, current : dict, tolerance : float) -> bool:
+    '''
+    Prints the changes of the OOPDB overhead against the baseline results
+
+    The overhead (ratio to sqlite3 on the same machine) is compared instead of absolute durations,
+    so results from different machines are comparable too
+
+    Returns False if the overhead of any case grew more than by the tolerance
+    '''
+    baseline_overheads = overheads(baseline["results"])
+    rows = []
+    ok = True
+    for key, ratio in overheads(current["results"]).items():
+        if key not in baseline_overheads:
+            continue
+        change = ratio / baseline_overheads[key] - 1
+        is_regression = change > tolerance
+        ok = ok and not is_regression
+        rows.append((key[0], key[1], f"{baseline_overheads[key]:.2f}x", f"{ratio:.2f}x", f"{change:+.1%}", "REGRESSION" if is_regression else ""))
+    print_table(rows, ["Case", "Rows", "Baseline overhead", "Overhead", "Change", ""])
+    return ok
+
+def main(arguments : Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks OOPDB against hand-written sqlite3 code")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000], help="Counts of rows in the benchmark tables")
+    parser.add_argument("--repeat", type=int, default=5, help="Count of measured runs of each case")
+    parser.add_argument("--warmup", type=int, default=1, help="Count of runs before measuring")
+    parser.add_argument("--cases", nargs="+", default=[], help="Names of the cases to run, all cases by default")
+    parser.add_argument("--output", default="", help="Path to the JSON file for results")
+    parser.add_argument("--baseline", default="", help="Path to the JSON file with previous results to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed relative growth of the overhead against the baseline")
+    options = parser.parse_args(arguments)
+
+    cases = [case for case in CASES if len(options.cases) == 0 or case.name in options.cases]
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in options.sizes:
+            results += run_size(size, cases, options.repeat, options.warmup, directory)
+
+    report = {
+        "metadata" : {
+            "date" : datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python" : platform.python_version(),
+            "sqlite" : sqlite3.sqlite_version,
+            "platform" : platform.platform(),
+            "repeat" : options.repeat,
+            "warmup" : options.warmup,
+        },
+        "results" : results,
+    }
+    print_summary(results)
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    if options.baseline:
+        with open(options.baseline, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        if not compare(baseline, report, options.tolerance):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,7 @@
 from oopdb.OOPDB import OOPDB
 from oopdb.ColumnConfig import ColumnConfig, DataTypes
 
+import datetime
 import random
 import os
 
@@ -22,6 +23,7 @@ def create_dummy_db(table_cnt : int, max_columns_per_table : int, max_rows_per_t
         db.create_table(table_name, columns).execute()
         
         row_cnt = random.randint(1, max_rows_per_table)
+        rows = []
         for row_id in range(1, row_cnt):
             row = []
             for column_id in range(column_cnt):
@@ -29,7 +31,16 @@ def create_dummy_db(table_cnt : int, max_columns_per_table : int, max_rows_per_t
                     row.append(random.randint(1, 100))
                 elif columns[column_id].type == DataTypes.TEXT:
                     row.append(f"{table_name}_({row_id}, {column_id})_Text")
-            db.insert_into(table_name, column_names, row).execute()
+                elif columns[column_id].type == DataTypes.BOOL:
+                    row.append(bool(random.getrandbits(1)))
+                elif columns[column_id].type == DataTypes.REAL:
+                    row.append(random.uniform(0, 100))
+                elif columns[column_id].type == DataTypes.BLOB:
+                    row.append(random.randbytes(8))
+                elif columns[column_id].type == DataTypes.TIMESTAMP:
+                    row.append(datetime.datetime.now(datetime.timezone.utc))
+            rows.append(row)
+        db.insert_many(table_name, column_names, rows)
     db.close()
 
 def select_from_dummy():
@@ -19,6 +19,9 @@ setuptools.setup(
         "Programming Language :: Python :: 3",
         "Operating System :: OS Independent",
     ],
+    extras_require={
+        "numpy": ["numpy"],
+    },
     package_dir={"": "src"},
     packages=setuptools.find_packages(where="src"),
 )
\ No newline at end of file
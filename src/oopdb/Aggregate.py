@@ -0,0 +1,67 @@
+class Aggregate:
+    '''
+    Builders of aggregate columns for select command
+
+    Each builder returns column expression that can be passed to select columns together with plain column names,
+    and used by having and order by commands, e.g.
+        db.select("Sales", ["Region", Aggregate.SUM("Amount", "Total")]).group_by(["Region"]).having(Expression("Total", Operation.GREATER_THAN, 100))
+    '''
+
+    @staticmethod
+    def SUM(column_name : str, alias : str = "") -> str:
+        '''
+        Sum of the column values in the group
+
+        column_name : str, required
+            The name of the column or other expression to be aggregated
+        alias : str, optional
+            The name of the result column
+        '''
+        return Aggregate.__aggregate("SUM", column_name, alias)
+
+    @staticmethod
+    def AVG(column_name : str, alias : str = "") -> str:
+        '''
+        Average of the column values in the group, see SUM for parameters
+        '''
+        return Aggregate.__aggregate("AVG", column_name, alias)
+
+    @staticmethod
+    def MIN(column_name : str, alias : str = "") -> str:
+        '''
+        Minimal column value in the group, see SUM for parameters
+        '''
+        return Aggregate.__aggregate("MIN", column_name, alias)
+
+    @staticmethod
+    def MAX(column_name : str, alias : str = "") -> str:
+        '''
+        Maximal column value in the group, see SUM for parameters
+        '''
+        return Aggregate.__aggregate("MAX", column_name, alias)
+
+    @staticmethod
+    def COUNT(column_name : str = "", distinct : bool = False, alias : str = "") -> str:
+        '''
+        Count of rows in the group
+
+        column_name : str, optional
+            The name of the column which not null values are counted, all rows are counted if empty
+        distinct : bool, optional, default False
+            Counts only unique column values, column name is required
+        alias : str, optional
+            The name of the result column
+        '''
+        if distinct and column_name == "":
+            raise Exception("Can't count distinct values for '*' expression, please specify column name")
+        argument = column_name if column_name != "" else "*"
+        if distinct:
+            argument = f"DISTINCT {argument}"
+        return Aggregate.__aggregate("COUNT", argument, alias)
+
+    @staticmethod
+    def __aggregate(function : str, argument : str, alias : str) -> str:
+        res = f"{function}({argument})"
+        if alias != "":
+            res += f" AS {alias}"
+        return res
@@ -0,0 +1,201 @@
+import asyncio
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, List, Optional, Sequence, Union
+from .Expression import Expression
+from .OOPDB import FileFormat, ImportProgress, OOPDB, OrderingTypes, RowsStyle, Statement, TransactionMode
+from .Tracing import TraceEvent
+
+class AsyncOOPDB(OOPDB):
+    '''
+    asyncio front-end for OOPDB
+
+    Has the same builder API as OOPDB, but execute, fetch and other commands that access the data base
+    return awaitables and are processed by worker threads, so the event loop isn't blocked by sqlite calls.
+    Each worker has its own connection and a query is processed by the least loaded worker,
+    so one slow query doesn't stall queries from other coroutines.
+    Commands are taken from the queue at the moment of the call, before awaiting, so several
+    queries can be built and awaited concurrently
+    '''
+
+    def __init__(self) -> None:
+        super(AsyncOOPDB, self).__init__()
+        self.workers = []
+
+    def open(self, db_path : str, workers : int = 1, **open_options : Any) -> 'AsyncOOPDB':
+        '''
+        db_path : str, required
+            The path to the data base
+        workers : int, optional, default 1
+            Count of worker threads, each worker has its own connection
+        open_options : Any, optional
+            Options passed to OOPDB.open for each worker connection
+        '''
+        self.workers = []
+        for _ in range(workers):
+            worker = _Worker()
+            worker.executor.submit(worker.open, db_path, open_options, self.tracer).result()
+            self.workers.append(worker)
+        return self
+
+    def close(self) -> None:
+        '''
+        Waits for all started commands and closes connections of all workers
+        '''
+        for worker in self.workers:
+            worker.executor.submit(worker.db.close).result()
+            worker.executor.shutdown()
+        self.workers = []
+
+    def settings(self) -> Awaitable[dict]:
+        '''
+        Asynchronous version of OOPDB.settings, returns settings of the least loaded worker's connection
+        '''
+        return self.run(lambda db: db.settings())
+
+    def open_in_memory(self, *args : Any, **kwargs : Any):
+        raise Exception("Open in memory isn't supported by AsyncOOPDB because each worker has its own connection, use open with a file instead")
+
+    def snapshot(self, to_path : str, pages_per_step : int = 1024, sleep : float = 0.0) -> Awaitable[bool]:
+        '''
+        Asynchronous version of OOPDB.snapshot
+        '''
+        return self.run(lambda db: db.snapshot(to_path, pages_per_step, sleep))
+
+    def enable_auto_snapshot(self, *args : Any, **kwargs : Any):
+        raise Exception("Auto snapshot isn't supported by AsyncOOPDB because each worker has its own connection, use snapshot instead")
+
+    def migrate_bool_columns(self) -> Awaitable[int]:
+        '''
+        Asynchronous version of OOPDB.migrate_bool_columns
+        '''
+        return self.run(lambda db: db.migrate_bool_columns())
+
+    def enable_result_cache(self, *args : Any, **kwargs : Any):
+        raise Exception("Result cache isn't supported by AsyncOOPDB because each worker has its own connection and modifications "
+                        "made by one worker don't invalidate results cached by others")
+
+    def set_tracer(self, tracer : Optional[Callable[[TraceEvent], None]]) -> None:
+        '''
+        Sets the tracer for connections of all workers, see OOPDB.set_tracer
+
+        The tracer is called from worker threads
+        '''
+        self.tracer = tracer
+        for worker in self.workers:
+            worker.executor.submit(worker.db.set_tracer, tracer).result()
+
+    def run(self, function : Callable[[OOPDB], Any]) -> Awaitable[Any]:
+        '''
+        Runs function with the worker's OOPDB instance
+
+        Used for commands that don't have asynchronous version, e.g. transactions
+
+        function : Callable[[OOPDB], Any], required
+            Function that takes OOPDB and returns any result
+        '''
+        return self.__submit(self.__pick_worker(), function)
+
+    def insert_many(self, table_name : str, columns : List[str], rows : Iterable[Sequence[Any]], chunk_size : int = 10000) -> Awaitable[List[int]]:
+        '''
+        Asynchronous version of OOPDB.insert_many
+        '''
+        return self.run(lambda db: db.insert_many(table_name, columns, rows, chunk_size))
+
+    def upsert(self, table_name : str, columns : List[str], rows : Iterable[Sequence[Any]], conflict_columns : List[str],
+               update_columns : Optional[List[str]] = None, chunk_size : int = 10000) -> Awaitable[List[int]]:
+        '''
+        Asynchronous version of OOPDB.upsert
+        '''
+        return self.run(lambda db: db.upsert(table_name, columns, rows, conflict_columns, update_columns, chunk_size))
+
+    def update_many(self, table_name : str, key_column : str, columns : List[str], rows : Iterable[Sequence[Any]], chunk_size : int = 10000) -> Awaitable[int]:
+        '''
+        Asynchronous version of OOPDB.update_many
+        '''
+        return self.run(lambda db: db.update_many(table_name, key_column, columns, rows, chunk_size))
+
+    def import_file(self, table_name : str, path : str, format : Optional[FileFormat] = None, column_map : Optional[dict] = None,
+                    chunk_size : int = 10000, defer_indexes : bool = False, progress : Optional[Callable[[ImportProgress], None]] = None,
+                    encoding : str = "utf-8", delimiter : str = ",") -> Awaitable[int]:
+        '''
+        Asynchronous version of OOPDB.import_file, progress is reported from the worker thread
+        '''
+        return self.run(lambda db: db.import_file(table_name, path, format, column_map, chunk_size, defer_indexes, progress, encoding, delimiter))
+
+    def parallel_scan(self, table_name : str, columns : List[str] = [], where : Optional[Expression] = None,
+                      order_columns : List[str] = [], orders : List[OrderingTypes] = [], workers : int = 4,
+                      rows_style : RowsStyle = RowsStyle.TUPLE) -> Awaitable[List[Any]]:
+        '''
+        Asynchronous version of OOPDB.parallel_scan, the worker thread waits for the scanning processes
+        '''
+        return self.run(lambda db: db.parallel_scan(table_name, columns, where, order_columns, orders, workers, rows_style))
+
+    def last_row_id(self) -> int:
+        raise Exception("Last row id isn't supported by AsyncOOPDB because each worker has its own connection, use run instead")
+
+    def transaction(self, mode : Union[TransactionMode, str] = TransactionMode.DEFERRED):
+        raise Exception("Transaction isn't supported by AsyncOOPDB because each worker has its own connection, use run instead")
+
+    def explain(self, *args : Any, **kwargs : Any):
+        raise Exception("Explain isn't supported by AsyncOOPDB because each worker has its own connection, use run instead")
+
+    def stream(self, batch_size : int = 1000, rows_style : RowsStyle = RowsStyle.TUPLE) -> AsyncIterator[Any]:
+        '''
+        Executes all queued commands and returns asynchronous generator over the result rows, see OOPDB.iter_rows
+
+        batch_size : int, optional, default 1000
+            Count of rows pulled from the data base by the worker at once
+        rows_style - RowsStyle, optional
+            Defines how fetched rows will be look like
+        '''
+        return self.iter_rows(batch_size, rows_style)
+
+    def _execute_statements(self, statements : List[Statement]) -> Awaitable[bool]:
+        return self.run(lambda db: db._execute_statements(statements))
+
+    def _fetch_statements(self, statements : List[Statement], rows_style : RowsStyle) -> Awaitable[List[Any]]:
+        return self.run(lambda db: db._fetch_statements(statements, rows_style))
+
+    async def _iter_rows(self, statements : List[Statement], batch_size : int, rows_style : RowsStyle) -> AsyncIterator[Any]:
+        # the generator is bound to the connection of one worker, so all batches are pulled by the same worker
+        worker = self.__pick_worker()
+        rows = await self.__submit(worker, lambda db: db._iter_rows(statements, batch_size, rows_style))
+        try:
+            while True:
+                batch = await self.__submit(worker, lambda _: list(itertools.islice(rows, batch_size)))
+                if len(batch) == 0:
+                    break
+                for row in batch:
+                    yield row
+        finally:
+            await self.__submit(worker, lambda _: rows.close())
+
+    def __pick_worker(self) -> '_Worker':
+        if len(self.workers) == 0:
+            raise Exception("AsyncOOPDB isn't opened")
+        return min(self.workers, key=lambda worker: worker.pending_cnt)
+
+    def __submit(self, worker : '_Worker', function : Callable[[OOPDB], Any]) -> Awaitable[Any]:
+        loop = asyncio.get_running_loop()
+        worker.pending_cnt += 1
+        future = loop.run_in_executor(worker.executor, lambda: function(worker.db))
+        def on_done(_):
+            worker.pending_cnt -= 1
+        future.add_done_callback(on_done)
+        return future
+
+class _Worker:
+    '''
+    Single thread executor with its own data base connection
+    '''
+
+    def __init__(self) -> None:
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="AsyncOOPDB")
+        self.db = None
+        self.pending_cnt = 0
+
+    def open(self, db_path : str, open_options : dict, tracer : Optional[Callable[[TraceEvent], None]]) -> None:
+        self.db = OOPDB()
+        self.db.set_tracer(tracer)
+        self.db.open(db_path, **open_options)
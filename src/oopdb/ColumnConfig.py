@@ -7,19 +7,31 @@ class DataTypes(enum.Enum):
             Holds a string with a maximum length of 65,535 bytes
         INTEGER
             A medium integer. Signed range is from -2147483648 to 2147483647.
+        BOOL
+            Bool value stored as integer 0 or 1
+        REAL
+            Floating point value stored as 8-byte IEEE number
+        BLOB
+            Binary data stored exactly as it was given (bytes)
+        TIMESTAMP
+            Date and time stored as integer microseconds since epoch, fetched as UTC datetime.
+            Declared as OOPDB_TIMESTAMP, so the sqlite3 module's TIMESTAMP converter stays unchanged for other connections
     '''
     TEXT = 'TEXT'
     INTEGER = 'INTEGER'
     BOOL = 'BOOL'
+    REAL = 'REAL'
+    BLOB = 'BLOB'
+    TIMESTAMP = 'OOPDB_TIMESTAMP'
 
 class ColumnConfig:
     '''
     Base column configuration as abstraction for data base column
 
-    Commonly defined by 'name' and 'type' also 'is_null' optional option is available
+    Commonly defined by 'name' and 'type' also 'is_null', 'is_indexed' and 'is_unique' optional options are available
     '''
 
-    def __init__(self, name : str, type : DataTypes, is_null : bool = True) -> 'ColumnConfig':
+    def __init__(self, name : str, type : DataTypes, is_null : bool = True, is_indexed : bool = False, is_unique : bool = False) -> 'ColumnConfig':
         '''
         name : str, required
             The name for column
@@ -27,10 +39,16 @@ class ColumnConfig:
             The data type for column taken for supported data types(DataTypes)
         is_null : bool, optional
             Tells is the data in table cell can be null or always need to be set
+        is_indexed : bool, optional
+            Tells if the index for column has to be created together with the table
+        is_unique : bool, optional
+            Tells if the column values must be unique, unique index will be created together with the table
         '''
         self.name = name
         self.type = type
         self.is_null = is_null
+        self.is_indexed = is_indexed or is_unique
+        self.is_unique = is_unique
 
     def __str__(self) -> str:
         res = self.name + " " + self.type.value
@@ -69,7 +87,7 @@ class ForeignKey(ColumnConfig):
 
     Abstraction for foreign key in data base that is reference to some other table in data base
     '''
-    def __init__(self, name : str, reference_table : str, reference_column : str):
+    def __init__(self, name : str, reference_table : str, reference_column : str, is_indexed : bool = True):
         '''
         name : str, required
             The name of foreign key
@@ -77,8 +95,11 @@ class ForeignKey(ColumnConfig):
             Name of the table referenced by the key
         reference_column : str, required
             Name of the column referenced by the key
+        is_indexed : bool, optional, default True
+            Tells if the index for the key has to be created together with the table,
+            it's used for joins and lookups by the key so it's created by default
         '''
-        super(ForeignKey, self).__init__(name, DataTypes.INTEGER, False)
+        super(ForeignKey, self).__init__(name, DataTypes.INTEGER, False, is_indexed)
         self.reference_table = reference_table
         self.reference_column = reference_column
 
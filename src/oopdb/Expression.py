@@ -1,7 +1,7 @@
-from typing import Any
+from typing import Any, List, NamedTuple, Optional, Tuple
 import enum
-import copy
-from .Utils import wrap_value
+import json
+from .Utils import adapt_value, format_literal
 
 class Operation(enum.Enum):
     '''
@@ -20,7 +20,7 @@ class Operation(enum.Enum):
         LIKE
             Value type - string(str)
         IN
-            Value type - list
+            Value type - list, lists longer than Expression.LARGE_IN_THRESHOLD are bound as one JSON parameter
     '''
 
     EQUAL = "="
@@ -33,11 +33,46 @@ class Operation(enum.Enum):
     LIKE = "LIKE"
     IN = "IN"
 
+class CompiledExpression(NamedTuple):
+    '''
+    SQL form of the expression, see Expression
+        sql
+            Expression string with '?' placeholders for values
+        parameters
+            Values for the placeholders
+        columns
+            Names of the columns used by the expression
+        is_simple
+            Tells if the expression doesn't need brackets when it's combined with others
+        constant
+            True or False if the expression is always true or false, None otherwise
+    '''
+    sql : str
+    parameters : Tuple[Any, ...]
+    columns : Tuple[str, ...]
+    is_simple : bool
+    constant : Optional[bool] = None
+
 class Expression:
     '''
     Abstraction for bool expression that can be used in database queries
+
+    Expression is kept as a tree of conditions (column, operation and value) and boolean operations,
+    so combining expressions doesn't copy their strings. The tree is compiled to SQL only once on the first access
+    to 'expression', 'parameters' or 'columns'. Compilation flattens nested chains of the same boolean operation,
+    removes duplicated IN values and conditions, and folds always true or false branches (e.g. IN with empty list).
+
+    Values are never rendered into the expression string, each value is represented by
+    '?' placeholder and stored in 'parameters' list in the same order as placeholders.
+    Names of the columns used by the expression are stored in 'columns' list
+
+    IN lists with more values than LARGE_IN_THRESHOLD are compiled to 'column IN (SELECT value FROM json_each(?))'
+    with all values bound as one JSON array, so the query stays short, doesn't hit sqlite limit of parameters count
+    and has the same form for any count of values. None disables it, lists with binary values are always bound one by one
     '''
 
+    LARGE_IN_THRESHOLD = 100
+
     def __init__(self, column_name : str, operation : Operation, value : Any) -> None:
         '''
         Creates expression after check whether the value type matches given operation,
@@ -51,57 +86,87 @@ class Expression:
             The value for filtering. Its type depends on the given operation
         '''
         Expression.__check_value_type_for_operation(operation, value)
-        self.expression = f"{column_name} {operation.value} "
-        if operation == Operation.IN:
-            self.expression += f"({', '.join([wrap_value(elem) for elem in value])})"
-        elif operation == Operation.BETWEEN:
-            self.expression += f"{wrap_value(value[0])} AND {wrap_value(value[1])}"
+        self.column_name = column_name
+        self.operation = operation
+        self.value = value
+        # boolean operation ('AND', 'OR', 'NOT') and its operands for composite expressions
+        self.operator = None
+        self.operands = ()
+        self.__compiled = None
+
+    @staticmethod
+    def TRUE() -> 'Expression':
+        '''
+        Expression that is always true, it's removed when combined with other expressions by 'and'
+        '''
+        return Expression.__constant(True)
+
+    @staticmethod
+    def FALSE() -> 'Expression':
+        '''
+        Expression that is always false, it's removed when combined with other expressions by 'or'
+        '''
+        return Expression.__constant(False)
+
+    @property
+    def expression(self) -> str:
+        return self.compile().sql
+
+    @property
+    def parameters(self) -> List[Any]:
+        return list(self.compile().parameters)
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.compile().columns)
+
+    @property
+    def is_simple(self) -> bool:
+        return self.compile().is_simple
+
+    def compile(self, is_json_allowed : bool = True) -> CompiledExpression:
+        '''
+        Returns SQL form of the expression, it's built on the first call and cached
+
+        is_json_allowed : bool, optional, default True
+            Allows binding of large IN lists as JSON, see LARGE_IN_THRESHOLD.
+            The form without JSON is used where subqueries aren't allowed and isn't cached
+        '''
+        if self.__compiled is not None and (is_json_allowed or self.operator == "CONSTANT"):
+            return self.__compiled
+        if self.operator is None:
+            compiled = self.__compile_condition(is_json_allowed)
+        elif self.operator == "NOT":
+            compiled = self.__compile_not(is_json_allowed)
         else:
-            self.expression += f"{wrap_value(value)}"
-        self.is_simple = True
+            compiled = self.__compile_boolean(is_json_allowed)
+        if is_json_allowed:
+            self.__compiled = compiled
+        return compiled
 
     def OR(self, expression : 'Expression') -> 'Expression':
         '''
         Creates new expression that combines two other expressions with the 'or'
         '''
-        return Expression.__binary_operation(self, expression, "OR")
+        return Expression.__boolean("OR", (self, expression))
 
     def AND(self, expression : 'Expression') -> 'Expression':
         '''
         Creates new expression that combines two other expressions with the 'and'
         '''
-        return Expression.__binary_operation(self, expression, "AND")
+        return Expression.__boolean("AND", (self, expression))
 
-    @staticmethod
-    def __binary_operation(left_expression : 'Expression', right_expression : 'Expression', operation : str) -> 'Expression':
-        '''
-        Common function that proccess composition of two other expressions by the given operation
-
-        left_expression : Expression, required
-            Left sided part of the future composite expression
-        right_expression : Expression, required
-            Right sided part of the future composite expression
-        operation : str, required
-            String representation of the concatenate operation
-        '''
-        right = Expression.__get_wrapped_expression_str(right_expression)
-        left = Expression.__get_wrapped_expression_str(left_expression)
-        res = copy.copy(left_expression)
-        res.expression = f"{left} {operation} {right}"
-        res.is_simple = False
-        return res
-
-    @staticmethod
-    def __get_wrapped_expression_str(expression : 'Expression') -> str:
+    def inline_expression(self) -> str:
         '''
-        Wraps expression string representation if it's composite expression
+        Returns expression string with values rendered as literals instead of placeholders
 
-        expression : Expression, required
-            Expression to be wrapped
+        Used for the queries where sqlite doesn't allow parameters, e.g. partial index conditions
         '''
-        res = expression.expression
-        if not expression.is_simple:
-            res = f"({res})"
+        compiled = self.compile(is_json_allowed=False)
+        parts = compiled.sql.split("?")
+        res = parts[0]
+        for value, part in zip(compiled.parameters, parts[1:]):
+            res += format_literal(value) + part
         return res
 
     @staticmethod
@@ -112,14 +177,121 @@ class Expression:
         expression : Expression, required
             Expression to be negated
         '''
-        res = copy.copy(expression)
-        res.expression = "NOT "
-        if res.is_simple:
-            res.expression += f"{expression.expression}"
-        else:
-            res.expression += f"({expression.expression})"
+        return Expression.__boolean("NOT", (expression,))
+
+    @staticmethod
+    def __boolean(operator : str, operands : Tuple['Expression', ...]) -> 'Expression':
+        '''
+        Creates composite expression node, operands are kept as they are and compiled later
+
+        operator : str, required
+            'AND', 'OR', 'NOT' or 'CONSTANT' for always true or false expression
+        operands : Tuple[Expression, ...], required
+            Expressions combined by the operator
+        '''
+        res = Expression.__new__(Expression)
+        res.column_name = None
+        res.operation = None
+        res.value = None
+        res.operator = operator
+        res.operands = operands
+        res.__compiled = None
+        return res
+
+    @staticmethod
+    def __constant(value : bool) -> 'Expression':
+        res = Expression.__boolean("CONSTANT", ())
+        res.value = value
+        res.__compiled = CompiledExpression("1" if value else "0", (), (), True, value)
         return res
 
+    def __compile_condition(self, is_json_allowed : bool) -> CompiledExpression:
+        expression = f"{self.column_name} {self.operation.value} "
+        if self.operation == Operation.IN:
+            values = Expression.__unique_values(self.value)
+            if len(values) == 0:
+                return Expression.__constant(False).compile()
+            if is_json_allowed and Expression.__is_large_list(values):
+                expression += "(SELECT value FROM json_each(?))"
+                parameters = (json.dumps(values),)
+            else:
+                expression += f"({', '.join(['?'] * len(values))})"
+                parameters = tuple(values)
+        elif self.operation == Operation.BETWEEN:
+            expression += "? AND ?"
+            parameters = (adapt_value(self.value[0]), adapt_value(self.value[1]))
+        else:
+            expression += "?"
+            parameters = (adapt_value(self.value),)
+        return CompiledExpression(expression, parameters, (self.column_name,), True)
+
+    def __compile_not(self, is_json_allowed : bool) -> CompiledExpression:
+        operand = self.operands[0]
+        if operand.operator == "NOT":
+            return operand.operands[0].compile(is_json_allowed)
+        compiled = operand.compile(is_json_allowed)
+        if compiled.constant is not None:
+            return Expression.__constant(not compiled.constant).compile()
+        expression = f"NOT {compiled.sql}" if compiled.is_simple else f"NOT ({compiled.sql})"
+        return CompiledExpression(expression, compiled.parameters, compiled.columns, compiled.is_simple)
+
+    def __compile_boolean(self, is_json_allowed : bool) -> CompiledExpression:
+        # nested operations of the same type are flattened iteratively, so long chains don't hit recursion limit
+        operands = []
+        stack = [self]
+        while len(stack) > 0:
+            node = stack.pop()
+            if node.operator == self.operator:
+                stack.extend(reversed(node.operands))
+            else:
+                operands.append(node)
+
+        # 'and' is false if any operand is false, true operands don't change it; 'or' is the opposite
+        absorbing = self.operator == "OR"
+        parts = []
+        seen = set()
+        for operand in operands:
+            compiled = operand.compile(is_json_allowed)
+            if compiled.constant == absorbing:
+                return Expression.__constant(absorbing).compile()
+            if compiled.constant is not None:
+                continue
+            # types are a part of the key like in __unique_values, e.g. 1 and 1.0 match different text values
+            key = (compiled.sql, tuple((type(parameter), parameter) for parameter in compiled.parameters))
+            if key in seen:
+                continue
+            seen.add(key)
+            parts.append(compiled)
+
+        if len(parts) == 0:
+            return Expression.__constant(not absorbing).compile()
+        if len(parts) == 1:
+            return parts[0]
+        expression = f" {self.operator} ".join(part.sql if part.is_simple else f"({part.sql})" for part in parts)
+        parameters = tuple(parameter for part in parts for parameter in part.parameters)
+        columns = tuple(dict.fromkeys(column for part in parts for column in part.columns))
+        return CompiledExpression(expression, parameters, columns, False)
+
+    @staticmethod
+    def __is_large_list(values : List[Any]) -> bool:
+        if Expression.LARGE_IN_THRESHOLD is None or len(values) <= Expression.LARGE_IN_THRESHOLD:
+            return False
+        # JSON can't represent binary values, values are already adapted, so all of them are bytes
+        return not any(isinstance(value, bytes) for value in values)
+
+    @staticmethod
+    def __unique_values(values : List[Any]) -> List[Any]:
+        '''
+        Returns adapted values without duplicates in the order of the first occurrence,
+        adapted values are hashable, e.g. bytearray is converted to bytes
+        '''
+        # type is a part of the key, so e.g. 1 and '1' or 1 and 1.0 are kept as different values
+        unique = {}
+        for value in values:
+            value = adapt_value(value)
+            unique.setdefault((type(value), value), value)
+        return list(unique.values())
+
     @staticmethod
     def __check_value_type_for_operation(operation : Operation, value : Any) -> None:
         '''
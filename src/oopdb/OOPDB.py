@@ -1,9 +1,35 @@
 import sqlite3
 import enum
-from typing import Any, List
+import itertools
+import contextlib
+import csv
+import heapq
+import json
+import math
+import os
+import re
+import sys
+import time
+import urllib.request
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
 from .ColumnConfig import *
 from .Expression import *
-from .Utils import wrap_value
+from .QueryPlan import FullScan, QueryPlan, ScanPolicy
+from .Record import record_class
+from .ResultCache import ResultCache
+from .SchemaCatalog import SchemaCatalog
+from .Tracing import TraceEvent
+from .Utils import adapt_value, coerce_value, convert_bool, convert_timestamp
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+sqlite3.register_converter(DataTypes.BOOL.value, convert_bool)
+sqlite3.register_converter(DataTypes.TIMESTAMP.value, convert_timestamp)
 
 class OrderingTypes(enum.Enum):
     '''
@@ -21,63 +47,400 @@ class RowsStyle(enum.Enum):
             Each row will be represented as dictionary with column names as keys
         TUPLE
             Each row will be represented as tuple of values
+        RECORD
+            Each row will be represented as compact record with values available by index, attribute or column name.
+            Record class is generated once for each set of column names and has the same memory cost as tuple
+        COLUMNS
+            Result will be represented as dictionary with column names as keys and lists of column values as values.
+            If numpy is installed each column is numpy masked array where NULL values are masked,
+            array type is int64, float64 or bool if all not NULL values are of such type, otherwise object.
+            Result is collected from the data base by batches without creating objects for rows
     '''
     DICTIONARY = "DICT"
     TUPLE = "TUPLE"
+    RECORD = "RECORD"
+    COLUMNS = "COLUMNS"
+
+class Statement(NamedTuple):
+    '''
+    Single queued data base command
+        query
+            Query string with '?' placeholders for values
+        parameters
+            Values for the placeholders in the query
+        tables
+            Names of the tables that are read or modified by the command
+    '''
+    query : str
+    parameters : Tuple[Any, ...]
+    tables : Tuple[str, ...]
+
+    @property
+    def is_select(self) -> bool:
+        '''
+        Tells if the command only reads data
+        '''
+        return self.query.startswith("SELECT")
+
+    @property
+    def is_ddl(self) -> bool:
+        '''
+        Tells if the command changes the data base schema
+        '''
+        return self.query.startswith(("CREATE", "DROP", "ALTER"))
+
+class TransactionMode(enum.Enum):
+    '''
+    Supported transaction modes that maps on SQL transaction types
+        DEFERRED
+            Default value, locks are acquired on the first read or write
+        IMMEDIATE
+            Write lock is acquired on the transaction start
+        EXCLUSIVE
+            Exclusive lock is acquired on the transaction start
+    '''
+    DEFERRED = "DEFERRED"
+    IMMEDIATE = "IMMEDIATE"
+    EXCLUSIVE = "EXCLUSIVE"
+
+class Profile(enum.Enum):
+    '''
+    Presets of connection settings(PRAGMA commands) for typical work loads, see PROFILE_PRAGMAS
+        BULK_LOAD
+            Fastest writes for loading data, recent transactions can be lost on power failure
+        OLTP
+            Many short concurrent transactions, readers don't block on the writer
+        READ_ONLY_ANALYTICS
+            Big read only queries with large cache and memory mapped reading
+    '''
+    BULK_LOAD = "bulk_load"
+    OLTP = "oltp"
+    READ_ONLY_ANALYTICS = "read_only_analytics"
+
+# settings are applied in this order, locking mode has to be set before journal mode
+SUPPORTED_PRAGMAS = ["locking_mode", "journal_mode", "synchronous", "mmap_size", "cache_size", "temp_store", "busy_timeout"]
+
+PROFILE_PRAGMAS = {
+    Profile.BULK_LOAD : {
+        "journal_mode" : "WAL",
+        "synchronous" : "OFF",
+        "cache_size" : -256 * 1024,
+        "temp_store" : "MEMORY",
+    },
+    Profile.OLTP : {
+        "journal_mode" : "WAL",
+        "synchronous" : "NORMAL",
+        "mmap_size" : 256 * 1024 * 1024,
+        "cache_size" : -64 * 1024,
+        "temp_store" : "MEMORY",
+        "busy_timeout" : 5000,
+    },
+    Profile.READ_ONLY_ANALYTICS : {
+        "mmap_size" : 1024 * 1024 * 1024,
+        "cache_size" : -256 * 1024,
+        "temp_store" : "MEMORY",
+        "busy_timeout" : 5000,
+    },
+}
+
+class FileFormat(enum.Enum):
+    '''
+    Formats of the files that can be imported to the table, see OOPDB.import_file
+        CSV
+            Comma separated values with the header row that contains field names
+        JSONL
+            One JSON object per line
+    '''
+    CSV = "csv"
+    JSONL = "jsonl"
+
+class ImportProgress(NamedTuple):
+    '''
+    Progress of the file import reported after each chunk, see OOPDB.import_file
+        rows_count
+            Count of rows imported so far
+        duration
+            Seconds passed since the start of the import
+        rows_per_second
+            Average import speed
+    '''
+    rows_count : int
+    duration : float
+    rows_per_second : float
 
 class OOPDB:
     '''
     OOP abstraction for data base communication based on sqlite3
+
+    Commands are queued as separate statements(see Statement), each statement is a query string with '?'
+    placeholders and list of parameters bound to them, so sqlite can reuse compiled statements
+    for the queries with the same shape
     '''
 
     def __init__(self) -> None:
         self.query = ""
+        self.statements = []
+        self.transaction_depth = 0
+        self.result_cache = None
+        self.auto_snapshot = None
+        self.tracer = None
+        self.schema = None
+        self.__is_running_statement = False
+        self.__complete_statement()
 
-    def open(self, db_path : str) -> 'OOPDB':
+    def open(self, db_path : str, check_same_thread : bool = True, read_only : bool = False,
+             profile : Optional[Union[Profile, str]] = None, **pragmas : Union[int, str]) -> 'OOPDB':
         '''
         db_path : str, required
             The path to the data base
+        check_same_thread : bool, optional, default True
+            Allows to use the connection only in the thread where it was opened,
+            if disabled the caller is responsible for not using the connection from several threads at once
+        read_only : bool, optional, default False
+            Opens existing data base only for reading
+        profile : Profile or str, optional
+            Preset of connection settings, see Profile
+        pragmas : int or str, optional
+            Connection settings that override profile settings, supported settings are listed in SUPPORTED_PRAGMAS,
+            e.g. journal_mode="WAL", synchronous="NORMAL", mmap_size=2**28, cache_size=-65536, busy_timeout=5000.
+            Effective settings can be checked with settings
         If the file doesn't exist creates new empty data base using set path
         '''
         if db_path:
+            self.db_path = db_path
+            pragmas = OOPDB.__connection_pragmas(profile, pragmas)
             try:
-                self.connection = sqlite3.connect(db_path, detect_types=sqlite3.PARSE_DECLTYPES)
+                database = db_path
+                if read_only:
+                    database = f"file:{urllib.request.pathname2url(os.path.abspath(db_path))}?mode=ro"
+                self.connection = sqlite3.connect(database, detect_types=sqlite3.PARSE_DECLTYPES,
+                                                  check_same_thread=check_same_thread, uri=read_only)
                 self.connection.row_factory = sqlite3.Row
-                def bool_processor(v):
-                    if v == b"True":
-                        return True
-                    elif v == b"False":
-                        return False
-                    print(f"Wrong value {v} for BOOL type")
-                    raise ValueError
-                sqlite3.register_converter("BOOL", bool_processor)
-
                 self.cursor = self.connection.cursor()
+                self.schema = SchemaCatalog(self.connection)
+                if self.tracer is not None:
+                    self.connection.set_trace_callback(self.__on_sqlite_trace)
+                for pragma, value in pragmas.items():
+                    self.cursor.execute(f"PRAGMA {pragma} = {value}")
             except sqlite3.Error as e:
                 print(f"The error '{e}' occurred")
         return self
 
+    def settings(self) -> dict:
+        '''
+        Returns effective connection settings listed in SUPPORTED_PRAGMAS
+        '''
+        result = {}
+        for pragma in SUPPORTED_PRAGMAS:
+            self.cursor.execute(f"PRAGMA {pragma}")
+            result[pragma] = self.cursor.fetchone()[0]
+        return result
+
+    def set_tracer(self, tracer : Optional[Callable[[TraceEvent], None]]) -> None:
+        '''
+        Sets the function that receives information about each executed statement, see TraceEvent and SlowQueryLogger
+
+        Statements built by OOPDB are timed, internal statements that sqlite runs for transactions, settings etc
+        are reported by sqlite trace callback without timing
+
+        The tracer can be set before open, then it's applied to the opened connection
+
+        tracer : Callable[[TraceEvent], None], optional
+            Function that is called after each statement, None disables tracing
+        '''
+        self.tracer = tracer
+        if hasattr(self, "connection"):
+            self.connection.set_trace_callback(None if tracer is None else self.__on_sqlite_trace)
+
+    def open_in_memory(self, from_path : Optional[str] = None, check_same_thread : bool = True,
+                       profile : Optional[Union[Profile, str]] = None, **pragmas : Union[int, str]) -> 'OOPDB':
+        '''
+        Opens new data base in memory, see open for other options
+
+        Work with data base in memory is much faster, its content can be saved to the file with snapshot
+        or periodically with enable_auto_snapshot
+
+        from_path : str, optional
+            The path to the data base which content will be loaded to the memory, the file is opened only for reading,
+            so the error is printed and the data base stays empty if there is no such file
+        '''
+        self.open(":memory:", check_same_thread, profile=profile, **pragmas)
+        if from_path:
+            try:
+                source = sqlite3.connect(f"file:{urllib.request.pathname2url(os.path.abspath(from_path))}?mode=ro", uri=True)
+                try:
+                    source.backup(self.connection)
+                finally:
+                    source.close()
+            except sqlite3.Error as e:
+                print(f"The error '{e}' occurred for '{from_path}'")
+        return self
+
+    def snapshot(self, to_path : str, pages_per_step : int = 1024, sleep : float = 0.0) -> bool:
+        '''
+        Saves committed content of the data base to the file using sqlite backup
+
+        The content is copied by steps, so other connections to the source data base aren't blocked for the whole copy.
+        The content is written to the target data base through sqlite with its locking and journal (also WAL),
+        so the previous snapshot stays valid if the copy fails and other connections to it see the new content after the copy
+
+        to_path : str, required
+            The path to the data base file which content will be replaced by the snapshot
+        pages_per_step : int, optional, default 1024
+            Count of data base pages copied in one step
+        sleep : float, optional, default 0
+            Seconds to sleep between steps
+        '''
+        if self.transaction_depth > 0:
+            raise Exception("Snapshot can't be made inside of the transaction")
+        if self.connection.in_transaction:
+            raise Exception("Transaction opened directly by the connection is pending, commit or roll it back before snapshot")
+        try:
+            target = sqlite3.connect(to_path)
+            try:
+                self.connection.backup(target, pages=pages_per_step, sleep=sleep)
+            finally:
+                target.close()
+        except sqlite3.Error as e:
+            print(f"The error '{e}' occurred for snapshot to '{to_path}'")
+            return False
+        if self.auto_snapshot is not None:
+            self.auto_snapshot["last_time"] = time.monotonic()
+        return True
+
+    def enable_auto_snapshot(self, to_path : str, interval : float, pages_per_step : int = 1024) -> None:
+        '''
+        Enables periodic snapshots of the data base, commonly used for the data base in memory
+
+        The snapshot is made after executed commands(execute, insert_many) outside of the transaction
+        if at least 'interval' seconds passed since the previous snapshot, and on close
+
+        to_path : str, required
+            The path to the data base file that will be replaced by snapshots
+        interval : float, required
+            Minimal count of seconds between snapshots
+        pages_per_step : int, optional, default 1024
+            Count of data base pages copied in one step, see snapshot
+        '''
+        self.auto_snapshot = {"path" : to_path, "interval" : interval, "pages_per_step" : pages_per_step, "last_time" : time.monotonic()}
+
+    def disable_auto_snapshot(self) -> None:
+        '''
+        Disables periodic snapshots of the data base
+        '''
+        self.auto_snapshot = None
+
     def close(self) -> None:
+        if self.auto_snapshot is not None and self.transaction_depth == 0:
+            self.snapshot(self.auto_snapshot["path"], self.auto_snapshot["pages_per_step"])
         self.connection.close()
 
+    def migrate_bool_columns(self) -> int:
+        '''
+        Converts BOOL values stored as text 'True' and 'False' by older versions to integers 1 and 0
+
+        All tables of the data base are migrated in one transaction
+
+        Returns count of converted values
+        '''
+        converted_cnt = 0
+        table_names = self.schema.table_names()
+        with self.transaction():
+            for table_name in table_names:
+                bool_columns = [column.name for column in self.schema.columns(table_name) if column.type == DataTypes.BOOL]
+                for column_name in bool_columns:
+                    self.cursor.execute(f"UPDATE {table_name} SET {column_name} = ({column_name} = 'True') "
+                                        f"WHERE {column_name} IN ('True', 'False')")
+                    converted_cnt += self.cursor.rowcount
+        if converted_cnt > 0:
+            self.__invalidate_cache(table_names)
+        return converted_cnt
+
+    def enable_result_cache(self, max_entries : int = 1024, max_bytes : int = 64 * 1024 * 1024) -> ResultCache:
+        '''
+        Enables caching of fetched select results, see ResultCache
+
+        Results are cached by query string with parameters and rows style, cached results are invalidated
+        when the tables they depend on are modified by this OOPDB or when transaction is rolled back.
+        Modifications made by other connections aren't tracked
+
+        max_entries : int, optional, default 1024
+            Maximum count of cached results
+        max_bytes : int, optional, default 64MB
+            Maximum approximate size of all cached results in bytes
+
+        Returns the cache, its hits and misses counters can be used for sizing
+        '''
+        self.result_cache = ResultCache(max_entries, max_bytes)
+        return self.result_cache
+
+    def disable_result_cache(self) -> None:
+        '''
+        Disables caching of fetched select results and drops all cached results
+        '''
+        self.result_cache = None
+
     def execute(self) -> bool:
         '''
         Executes all queued commands
-        
+
         Commonly used after pushing, updating and other commands without any output
+        All queued commands are executed in one transaction that is committed at the end,
+        inside of the opened transaction(see transaction) they are executed in the savepoint
+        and committed together with the outer transaction
         '''
-        query = self.query
-        if query[-1] != ';':
-            query += ';'
-        self.query = ""
-        try:
-            self.cursor.executescript(query)
-            self.connection.commit()
-        except sqlite3.Error as e:
-            print(f"The error '{e}' occurred for query '{query}'")
-            return False
+        return self._execute_statements(self._take_statements())
 
-        return True
+    @contextlib.contextmanager
+    def transaction(self, mode : Union[TransactionMode, str] = TransactionMode.DEFERRED) -> Iterator['OOPDB']:
+        '''
+        Context manager that groups all commands executed inside it into one transaction
+
+        The transaction is committed on exit or rolled back if exception was raised or the commit failed.
+        Nested transactions are represented by savepoints, so the inner transaction can be rolled back
+        separately while its changes are committed only with the outermost transaction.
+        Exception is raised if the transaction opened directly by the connection is pending,
+        it has to be committed or rolled back first
+
+        mode : TransactionMode or str, optional, default TransactionMode.DEFERRED
+            Locking mode of the outermost transaction, ignored for nested ones
+        '''
+        mode = TransactionMode(mode)
+        if self.transaction_depth == 0:
+            # transaction implicitly opened by sqlite3 module for commands executed directly by the connection
+            # isn't committed, because it's unknown whether its changes are expected to be kept
+            if self.connection.in_transaction:
+                raise Exception("Transaction opened directly by the connection is pending, commit or roll it back before")
+            self.cursor.execute(f"BEGIN {mode.value}")
+        else:
+            savepoint = f"oopdb_savepoint_{self.transaction_depth}"
+            self.cursor.execute(f"SAVEPOINT {savepoint}")
+        self.transaction_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self.transaction_depth -= 1
+            # cached results could be made from the rolled back data
+            if self.result_cache is not None:
+                self.result_cache.clear()
+            if self.transaction_depth == 0:
+                self.connection.rollback()
+            else:
+                self.cursor.execute(f"ROLLBACK TO {savepoint}")
+                self.cursor.execute(f"RELEASE {savepoint}")
+            raise
+        self.transaction_depth -= 1
+        if self.transaction_depth == 0:
+            try:
+                self.connection.commit()
+            except sqlite3.Error:
+                # failed commit keeps the transaction open, its changes must not be committed later
+                self.connection.rollback()
+                if self.result_cache is not None:
+                    self.result_cache.clear()
+                raise
+        else:
+            self.cursor.execute(f"RELEASE {savepoint}")
 
     def fetch(self, rows_style : RowsStyle = RowsStyle.TUPLE) -> List[Any]:
         '''
@@ -90,21 +453,262 @@ class OOPDB:
 
         Returns list of rows
         '''
-        query = self.query
-        if query[-1] != ';':
-            query += ';'
-        self.query = ""
+        return self._fetch_statements(self._take_statements(), rows_style)
+
+    def iter_rows(self, batch_size : int = 1000, rows_style : RowsStyle = RowsStyle.TUPLE) -> Iterator[Any]:
+        '''
+        Executes all queued commands and returns generator over the result rows
+
+        Unlike fetch the result isn't materialized, rows are pulled from the data base by batches
+        while the generator is consumed, so the memory usage doesn't depend on the result size.
+        The queue is released immediately, so new commands can be queued and executed while iterating
+
+        batch_size : int, optional, default 1000
+            Count of rows pulled from the data base at once
+        rows_style - RowsStyle, optional
+            Defines how fetched rows will be look like
+
+        Returns generator over rows
+        '''
+        return self._iter_rows(self._take_statements(), batch_size, rows_style)
+
+    def parallel_scan(self, table_name : str, columns : List[str] = [], where : Optional[Expression] = None,
+                      order_columns : List[str] = [], orders : List[OrderingTypes] = [], workers : int = 4,
+                      rows_style : RowsStyle = RowsStyle.TUPLE) -> List[Any]:
+        '''
+        Selects rows from the table using several processes, doesn't use the queue
+
+        The table is split into ranges of rowid, each range is selected by separate process with its own
+        read only connection and results are merged preserving the order of rows.
+        Only committed data is visible for the scan and the data base must be stored in the file.
+        sqlite3.Error is raised if selection of some range fails
+
+        table_name : str, required
+            The name for the target table
+        columns : List[str], optional
+            List of column names, if empty all columns will be taken for result
+        where : Expression, optional
+            Expression for filtering
+        order_columns : List[str], optional
+            List of column names that will be sorted, they must be in the result columns.
+            If empty rows are ordered by rowid
+        orders : List[OrderingTypes], optional
+            List of sort orders for each ordering column
+        workers : int, optional, default 4
+            Count of processes and ranges
+        rows_style - RowsStyle, optional
+            Defines how fetched rows will be look like
+
+        Returns list of rows
+        '''
+        if len(order_columns) != len(orders):
+            raise Exception(f"Parallel scan failed due to mismatching sizes of '{order_columns}' and '{orders}' lists")
+        if workers < 1:
+            raise Exception(f"Parallel scan failed due to count of workers {workers}, at least one worker is required")
+        self.cursor.execute(f"SELECT MIN(rowid), MAX(rowid) FROM {table_name}")
+        min_row_id, max_row_id = self.cursor.fetchone()
+        if min_row_id is None:
+            return []
+
+        range_size = math.ceil((max_row_id - min_row_id + 1) / workers)
+        partitions = []
+        for range_start in range(min_row_id, max_row_id + 1, range_size):
+            condition = Expression("rowid", Operation.BETWEEN, (range_start, range_start + range_size - 1))
+            if where is not None:
+                condition = condition.AND(where)
+            builder = OOPDB().select(table_name, columns).where(condition)
+            if len(order_columns) > 0:
+                builder.order_by(order_columns, orders)
+            partitions.append(builder._take_statements())
+
+        with ProcessPoolExecutor(max_workers=len(partitions)) as executor:
+            results = list(executor.map(_scan_partition, [self.db_path] * len(partitions), partitions))
+        if len(results) == 0:
+            return []
+
+        column_names = results[0][0]
+        partition_rows = [rows for _, rows in results]
+        if len(order_columns) > 0:
+            missing_columns = [column for column in order_columns if column not in column_names]
+            if len(missing_columns) > 0:
+                raise Exception(f"Parallel scan ordering columns {missing_columns} must be in the result columns {column_names}")
+            key_indices = [column_names.index(column) for column in order_columns]
+            rows = heapq.merge(*partition_rows, key=lambda row: _OrderKey([row[i] for i in key_indices], orders))
+        else:
+            rows = itertools.chain(*partition_rows)
+
+        if rows_style == RowsStyle.DICTIONARY:
+            return [dict(zip(column_names, row)) for row in rows]
+        if rows_style == RowsStyle.RECORD:
+            return list(map(record_class(tuple(column_names))._make, rows))
+        if rows_style == RowsStyle.COLUMNS:
+            rows = list(rows)
+            return _make_columns(column_names, [[row[i] for row in rows] for i in range(len(column_names))])
+        return list(rows)
+
+    def prepare(self) -> 'Query':
+        '''
+        Takes all queued commands to the prepared query without executing them
+
+        The query is built once and can be executed many times, also with new values for its parameters,
+        while the queue is free for building other queries
+
+        Returns prepared query
+        '''
+        return Query(self, self._take_statements())
+
+    def explain(self, scan_policy : ScanPolicy = ScanPolicy.IGNORE, max_scan_rows : int = 1000) -> Optional[QueryPlan]:
+        '''
+        Takes the queued command and returns its plan reported by EXPLAIN QUERY PLAN without executing the command
+
+        Tables that are scanned without index and have more rows than max_scan_rows are listed in QueryPlan.full_scans
+        together with the columns of where and inner join conditions that can be indexed to search the table instead
+
+        scan_policy : ScanPolicy, optional, default ScanPolicy.IGNORE
+            Defines whether full scans are only listed, reported by warning or by Exception
+        max_scan_rows : int, optional, default 1000
+            Full scans of the tables with this count of rows or less are considered as cheap
+
+        Only one command is expected in the queue, otherwise Exception is raised.
+        Returns None if the command can't be explained
+        '''
+        predicate_columns = self.predicate_columns
+        statements = self._take_statements()
+        if len(statements) != 1:
+            raise Exception(f"Explain expects one queued command, but {len(statements)} commands are queued")
+        query, parameters, tables = statements[0]
         try:
-            self.cursor.execute(query)
-            if rows_style == RowsStyle.DICTIONARY:
-                result = [dict(row) for row in self.cursor.fetchall()]
-            else:
-                result = [tuple(row) for row in self.cursor.fetchall()]
-            return result
+            self.cursor.execute(f"EXPLAIN QUERY PLAN {query}", parameters)
+            plan = QueryPlan(query, [tuple(row) for row in self.cursor.fetchall()])
+            for table in plan.scanned_tables():
+                if table.lower() not in [name.lower() for name in tables]:
+                    continue
+                # counting is stopped after max_scan_rows, so the big table isn't scanned by the check itself
+                self.cursor.execute(f"SELECT COUNT(*) FROM (SELECT 1 FROM {table} LIMIT ?)", [max_scan_rows + 1])
+                rows_count = self.cursor.fetchone()[0]
+                if rows_count > max_scan_rows:
+                    plan.full_scans.append(FullScan(table, rows_count, self.__table_predicate_columns(table, tables, predicate_columns)))
+        except sqlite3.Error as e:
+            print(f"The error '{e}' occurred for query '{query}'")
+            return None
+
+        if len(plan.full_scans) > 0 and scan_policy != ScanPolicy.IGNORE:
+            message = f"Query '{query}' scans the whole tables: "
+            message += "; ".join(f"{scan.table} with more than {max_scan_rows} rows" +
+                                 (f", suggested index: {scan.suggested_index}" if scan.suggested_index else "")
+                                 for scan in plan.full_scans)
+            if scan_policy == ScanPolicy.RAISE:
+                raise Exception(message)
+            warnings.warn(message, stacklevel=2)
+        return plan
+
+    def _execute_statements(self, statements : List[Statement]) -> bool:
+        '''
+        Executes given statements in one transaction, see execute
+        '''
+        query = ""
+        try:
+            with self.transaction():
+                for query, parameters, _ in statements:
+                    start = self.__run(self.cursor, query, parameters)
+                    self.__trace(query, len(parameters), self.cursor.rowcount, time.perf_counter() - start)
+        except sqlite3.Error as e:
+            print(f"The error '{e}' occurred for query '{query}'")
+            return False
+
+        self.__invalidate_cache(table for statement in statements if not statement.is_select for table in statement.tables)
+        self.__invalidate_schema(statements)
+        self.__check_auto_snapshot()
+        return True
+
+    def _fetch_statements(self, statements : List[Statement], rows_style : RowsStyle) -> List[Any]:
+        '''
+        Executes given statements and returns result rows of the last one, see fetch
+        '''
+        if rows_style == RowsStyle.COLUMNS:
+            return self.__fetch_columns(statements)
+
+        is_cacheable = self.result_cache is not None and all(statement.is_select for statement in statements)
+        if is_cacheable:
+            cache_key = (tuple(statements), rows_style)
+            result = self.result_cache.get(cache_key)
+            if result is not None:
+                return result
+
+        query = ""
+        # commands that modify data are committed together like execute does
+        is_read_only = all(statement.is_select for statement in statements)
+        try:
+            with contextlib.nullcontext() if is_read_only else self.transaction():
+                for statement_id, (query, parameters, _) in enumerate(statements):
+                    start = self.__run(self.cursor, query, parameters)
+                    if statement_id + 1 < len(statements):
+                        self.__trace(query, len(parameters), self.cursor.rowcount, time.perf_counter() - start)
+                convert_row = OOPDB.__row_converter(rows_style, self.cursor)
+                # rows are taken from the cursor one by one, so only converted rows are kept in memory
+                result = [convert_row(row) for row in self.cursor]
+                if len(statements) > 0:
+                    self.__trace(query, len(parameters), len(result), time.perf_counter() - start)
         except sqlite3.Error as e:
             print(f"The error '{e}' occurred for query '{query}'")
             return []
 
+        if is_cacheable:
+            self.result_cache.put(cache_key, (table for statement in statements for table in statement.tables), result)
+        else:
+            self.__invalidate_cache(table for statement in statements if not statement.is_select for table in statement.tables)
+            self.__invalidate_schema(statements)
+        return result
+
+    def _iter_rows(self, statements : List[Statement], batch_size : int, rows_style : RowsStyle) -> Iterator[Any]:
+        '''
+        Generator that executes given statements on the separate cursor and yields result rows of the last one,
+        for RowsStyle.COLUMNS yields columns of each batch.
+        Commands that modify data are committed together like execute does before the first row is yielded,
+        so their result rows are taken at once
+        '''
+        cursor = self.connection.cursor()
+        query = ""
+        is_read_only = all(statement.is_select for statement in statements)
+        try:
+            if rows_style == RowsStyle.COLUMNS:
+                cursor.row_factory = None
+            with contextlib.nullcontext() if is_read_only else self.transaction():
+                for statement_id, (query, parameters, _) in enumerate(statements):
+                    start = self.__run(cursor, query, parameters)
+                    if statement_id + 1 < len(statements):
+                        self.__trace(query, len(parameters), cursor.rowcount, time.perf_counter() - start)
+                if is_read_only:
+                    fetch_rows = cursor.fetchmany
+                else:
+                    fetched_rows = iter(cursor.fetchall())
+                    fetch_rows = lambda size: list(itertools.islice(fetched_rows, size))
+            if not is_read_only:
+                self.__invalidate_cache(table for statement in statements if not statement.is_select for table in statement.tables)
+                self.__invalidate_schema(statements)
+            # time spent by the consumer between batches isn't counted
+            duration = time.perf_counter() - start
+            rows_count = 0
+            convert_row = OOPDB.__row_converter(rows_style, cursor)
+            while True:
+                start = time.perf_counter()
+                rows = fetch_rows(batch_size)
+                duration += time.perf_counter() - start
+                rows_count += len(rows)
+                if len(rows) == 0:
+                    if len(statements) > 0:
+                        self.__trace(query, len(parameters), rows_count, duration)
+                    break
+                if rows_style == RowsStyle.COLUMNS:
+                    yield _make_columns(OOPDB.__column_names(cursor), [list(values) for values in zip(*rows)])
+                    continue
+                for row in rows:
+                    yield convert_row(row)
+        except sqlite3.Error as e:
+            print(f"The error '{e}' occurred for query '{query}'")
+        finally:
+            cursor.close()
+
     def last_row_id(self) -> int:
         '''
         Returns the latest inserted row id
@@ -119,14 +723,14 @@ class OOPDB:
 
         The result will be rows with table names
         '''
-        self.query += "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%';"
+        self.__queue("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'", tables=["sqlite_master"])
         return self
 
     def column_names(self, table_name : str) -> 'OOPDB':
         '''
         Adds to the queue table's columns name getting command
         '''
-        self.query += f"SELECT name FROM PRAGMA_TABLE_INFO('{table_name}');"
+        self.__queue("SELECT name FROM PRAGMA_TABLE_INFO(?)", [table_name], ["sqlite_master"])
         return self
 
     def create_table(self, table_name : str, columns : List[ColumnConfig]) -> 'OOPDB':
@@ -136,10 +740,54 @@ class OOPDB:
         table_name : str, required
             The name for the new table
         columns : List[ColumnConfig], required
-            List of column configs for new table
+            List of column configs for new table, indexes for columns with 'is_indexed' option
+            are queued together with the table and named as '<table_name>_<column_name>_index'
+        '''
+        self.__queue(f"CREATE TABLE {table_name} ({OOPDB.__format_array(columns)})", tables=[table_name, "sqlite_master"])
+        for column in columns:
+            if column.is_indexed:
+                self.create_index(f"{table_name}_{column.name}_index", table_name, [column.name], column.is_unique)
+
+        return self
+
+    def create_index(self, index_name : str, table_name : str, columns : List[str], is_unique : bool = False, where : Optional[Expression] = None) -> 'OOPDB':
+        '''
+        Adds to the queue index creation command
+
+        index_name : str, required
+            The name for the new index
+        table_name : str, required
+            The name of the table to be indexed
+        columns : List[str], required
+            List of column names that will be indexed, several columns create composite index
+        is_unique : bool, optional, default False
+            Forbids duplicated values for indexed columns
+        where : Expression, optional
+            Condition for partial index, only rows that match it will be indexed.
+            Values of the expression are rendered to the query because sqlite doesn't allow parameters there
+        '''
+        query = "CREATE "
+        if is_unique:
+            query += "UNIQUE "
+        query += f"INDEX {index_name} ON {table_name} ({OOPDB.__format_array(columns)})"
+        if where is not None:
+            query += f" WHERE {where.inline_expression()}"
+        self.__queue(query, tables=["sqlite_master"])
+        return self
+
+    def drop_index(self, index_name : str, if_exists : bool = True) -> 'OOPDB':
         '''
-        self.query += f"CREATE TABLE {table_name} ({OOPDB.__format_array(columns)});"
+        Adds to the queue index removal command
 
+        index_name : str, required
+            The name of the index to be removed
+        if_exists : bool, optional, default True
+            Doesn't fail if there is no index with the given name
+        '''
+        query = "DROP INDEX "
+        if if_exists:
+            query += "IF EXISTS "
+        self.__queue(query + index_name, tables=["sqlite_master"])
         return self
 
     def insert_into(self, table_name : str, columns : List[str], values : List[Any]) -> 'OOPDB':
@@ -153,11 +801,206 @@ class OOPDB:
         values : List[Any], required
             List of values for selected columns
         '''
-        self.query += f"INSERT INTO {table_name} ({OOPDB.__format_array(columns)}) "
-        self.query += f"VALUES ({OOPDB.__format_values(values)});"
+        self.__queue(f"INSERT INTO {table_name} ({OOPDB.__format_array(columns)}) "
+                     f"VALUES ({OOPDB.__format_placeholders(len(values))})",
+                     [adapt_value(value) for value in values], [table_name])
 
         return self
 
+    def insert_many(self, table_name : str, columns : List[str], rows : Iterable[Sequence[Any]], chunk_size : int = 10000) -> List[int]:
+        '''
+        Inserts rows to the table immediately without queueing
+
+        Rows are taken lazily from the given iterable and inserted by chunks, each chunk in its own transaction.
+        Row ids are returned by RETURNING for sqlite 3.35 and newer, so rows of the chunk are inserted one by one,
+        for older versions the chunk is inserted with one executemany call unless some rows have explicit row ids
+
+        table_name : str, required
+            The name for the target table
+        columns : List[str], required
+            List of column names that will be defined by new values
+        rows : Iterable[Sequence[Any]], required
+            Any iterable of rows, each row contains values for selected columns
+        chunk_size : int, optional, default 10000
+            Maximum count of rows inserted in one transaction
+
+        Returns list of row ids of inserted rows, None for each row of the table WITHOUT ROWID.
+        If some chunk fails the ids of already inserted chunks are returned
+        '''
+        adapt_row = lambda row: [adapt_value(value) for value in row]
+        return [row_id for row_ids in self.__insert_chunks(table_name, columns, rows, chunk_size, adapt_row) for row_id in row_ids]
+
+    def upsert(self, table_name : str, columns : List[str], rows : Iterable[Sequence[Any]], conflict_columns : List[str],
+               update_columns : Optional[List[str]] = None, chunk_size : int = 10000) -> List[int]:
+        '''
+        Inserts rows to the table or updates existing rows that conflict with them immediately without queueing
+
+        Rows are taken lazily from the given iterable and processed by chunks, each chunk in its own transaction
+
+        table_name : str, required
+            The name for the target table
+        columns : List[str], required
+            List of column names that will be defined by new values
+        rows : Iterable[Sequence[Any]], required
+            Any iterable of rows, each row contains values for selected columns
+        conflict_columns : List[str], required
+            Columns of the primary key or unique index that identify existing rows
+        update_columns : List[str], optional
+            Columns that are updated by new values for existing rows, by default all columns except conflict ones,
+            empty list keeps existing rows unchanged
+        chunk_size : int, optional, default 10000
+            Maximum count of rows processed in one transaction
+
+        Returns list of row ids of inserted and updated rows, row ids are returned only by sqlite 3.35 and newer
+        that supports RETURNING, for older versions the list is empty.
+        If some chunk fails the ids of already processed chunks are returned
+        '''
+        if update_columns is None:
+            update_columns = [column for column in columns if column not in conflict_columns]
+        query = f"INSERT INTO {table_name} ({OOPDB.__format_array(columns)}) VALUES ({OOPDB.__format_placeholders(len(columns))}) "
+        query += f"ON CONFLICT ({OOPDB.__format_array(conflict_columns)}) "
+        if len(update_columns) > 0:
+            query += f"DO UPDATE SET {OOPDB.__format_array(f'{column} = excluded.{column}' for column in update_columns)}"
+        else:
+            query += "DO NOTHING"
+        # executemany discards rows returned by statements, so with RETURNING rows are executed one by one
+        # in the chunk transaction, the statement is compiled once and reused from the connection's cache
+        is_returning = sqlite3.sqlite_version_info >= (3, 35, 0)
+        if is_returning:
+            query += " RETURNING rowid"
+        def write_chunk(chunk : List[List[Any]]) -> Tuple[List[int], int]:
+            chunk_row_ids = []
+            if is_returning:
+                for row in chunk:
+                    self.__run(self.cursor, query, row)
+                    chunk_row_ids += [returned[0] for returned in self.cursor.fetchall()]
+            else:
+                self.__run(self.cursor, query, chunk, many=True)
+            return chunk_row_ids, len(chunk)
+        adapt_row = lambda row: [adapt_value(value) for value in row]
+        return [row_id for row_ids in self.__write_chunks(table_name, query, rows, chunk_size, adapt_row, write_chunk) for row_id in row_ids]
+
+    def update_many(self, table_name : str, key_column : str, columns : List[str], rows : Iterable[Sequence[Any]], chunk_size : int = 10000) -> int:
+        '''
+        Updates rows of the table identified by the key column immediately without queueing
+
+        Rows are taken lazily from the given iterable and updated by chunks,
+        each chunk is updated with one executemany call in its own transaction
+
+        table_name : str, required
+            The name for the target table
+        key_column : str, required
+            The name of the column that identifies the rows to update, must be one of the 'columns'
+        columns : List[str], required
+            List of column names of the rows, all columns except the key one are updated by new values
+        rows : Iterable[Sequence[Any]], required
+            Any iterable of rows, each row contains values for selected columns
+        chunk_size : int, optional, default 10000
+            Maximum count of rows updated in one transaction
+
+        Returns count of updated rows, if some chunk fails the count of rows updated by already processed chunks is returned
+        '''
+        if key_column not in columns:
+            raise Exception(f"Key column '{key_column}' isn't in the columns {columns}")
+        key_index = columns.index(key_column)
+        update_indices = [index for index, column in enumerate(columns) if index != key_index]
+        query = f"UPDATE {table_name} SET {OOPDB.__format_array(f'{columns[index]} = ?' for index in update_indices)} WHERE {key_column} = ?"
+        def write_chunk(chunk : List[List[Any]]) -> Tuple[int, int]:
+            self.__run(self.cursor, query, chunk, many=True)
+            return self.cursor.rowcount, self.cursor.rowcount
+        adapt_row = lambda row: [adapt_value(row[index]) for index in update_indices] + [adapt_value(row[key_index])]
+        return sum(self.__write_chunks(table_name, query, rows, chunk_size, adapt_row, write_chunk))
+
+    def import_file(self, table_name : str, path : str, format : Optional[FileFormat] = None, column_map : Optional[dict] = None,
+                    chunk_size : int = 10000, defer_indexes : bool = False, progress : Optional[Callable[[ImportProgress], None]] = None,
+                    encoding : str = "utf-8", delimiter : str = ",") -> int:
+        '''
+        Imports rows from CSV or JSONL file to the existing table immediately without queueing
+
+        The file is read lazily and rows are inserted by chunks like insert_many does, so memory usage is bounded by the chunk size.
+        Values are converted to the data types of the table columns (see coerce_value in Utils)
+
+        table_name : str, required
+            The name for the target table
+        path : str, required
+            The path to the file
+        format : FileFormat, optional
+            Format of the file, by default it's defined by the file extension (.csv, .jsonl or .ndjson)
+        column_map : dict, optional
+            Names of the table columns for the file fields, other fields are skipped.
+            By default the fields that have the same names as the table columns are imported,
+            for CSV the fields are taken from the header, for JSONL the fields missing in the object aren't inserted, so column defaults are used for them
+        chunk_size : int, optional, default 10000
+            Maximum count of rows inserted in one transaction
+        defer_indexes : bool, optional, default False
+            Drops not unique indexes of the table created by create index commands before the import and creates them again after it,
+            that's faster for big imports, unique indexes and primary key constraints stay as they are.
+            Exception is raised if some index can't be created again
+        progress : Callable[[ImportProgress], None], optional
+            Function that is called after each imported chunk
+        encoding : str, optional, default 'utf-8'
+            Encoding of the file
+        delimiter : str, optional, default ','
+            Delimiter of the CSV file fields
+
+        Returns count of imported rows, if some row can't be converted or inserted the import stops
+        and the count of rows of already imported chunks is returned
+        '''
+        if format is None:
+            extension = os.path.splitext(path)[1].lower()
+            if extension not in (".csv", ".jsonl", ".ndjson"):
+                raise Exception(f"Can't define format of the file '{path}', please specify it")
+            format = FileFormat.CSV if extension == ".csv" else FileFormat.JSONL
+        table_columns = {column.name : column for column in self.schema.columns(table_name)}
+        if len(table_columns) == 0:
+            raise Exception(f"Table '{table_name}' doesn't exist")
+        if column_map is not None:
+            for column in column_map.values():
+                if column not in table_columns:
+                    raise Exception(f"Column '{column}' doesn't exist in the table '{table_name}'")
+
+        indexes = self.__drop_indexes(table_name) if defer_indexes else []
+        imported_cnt = 0
+        start = time.perf_counter()
+        try:
+            with open(path, "r", encoding=encoding, newline="") as file:
+                if format == FileFormat.CSV:
+                    records = csv.DictReader(file, delimiter=delimiter)
+                else:
+                    records = (json.loads(line) for line in file if line.strip())
+                records = iter(records)
+                first_record = next(records, None)
+                if first_record is None:
+                    return 0
+                if column_map is not None:
+                    fields_map = column_map
+                elif format == FileFormat.CSV:
+                    fields_map = {field : field for field in first_record if field in table_columns}
+                else:
+                    fields_map = {column : column for column in table_columns}
+                data_types = {field : table_columns[column].type for field, column in fields_map.items()}
+                # JSON objects can skip fields, missing fields aren't inserted, so the column defaults are used for them
+                is_sparse = format == FileFormat.JSONL
+                adapt_row = lambda record: {fields_map[field] : adapt_value(coerce_value(record.get(field), data_type))
+                                            for field, data_type in data_types.items() if not is_sparse or field in record}
+                query = OOPDB.__insert_query(table_name, list(fields_map.values()))
+                def write_chunk(chunk : List[dict]) -> Tuple[int, int]:
+                    # consecutive rows with the same columns are inserted by one executemany call
+                    for columns, rows in itertools.groupby(chunk, key=tuple):
+                        self.__run(self.cursor, OOPDB.__insert_query(table_name, list(columns)), [list(row.values()) for row in rows], many=True)
+                    return len(chunk), len(chunk)
+                records = itertools.chain([first_record], records)
+                for inserted_cnt in self.__write_chunks(table_name, query, records, chunk_size, adapt_row, write_chunk):
+                    imported_cnt += inserted_cnt
+                    if progress is not None:
+                        duration = time.perf_counter() - start
+                        progress(ImportProgress(imported_cnt, duration, imported_cnt / duration if duration > 0 else 0.0))
+        except (ValueError, TypeError, AttributeError) as e:
+            print(f"The error '{e}' occurred for the record after {imported_cnt} imported rows of the file '{path}'")
+        finally:
+            self.__create_indexes(indexes)
+        return imported_cnt
+
     def select(self, table_name : str, columns : List[str] = [], distinct : bool = False) -> 'OOPDB':
         '''
         Adds to the queue select data rows command
@@ -169,14 +1012,15 @@ class OOPDB:
         distinct : bool, optional, default False
             Force result to contain only unique rows
         '''
-        self.query += "SELECT "
+        query = "SELECT "
         if distinct:
-            self.query += "DISTINCT "
+            query += "DISTINCT "
         if len(columns) > 0:
-            self.query += f"{OOPDB.__format_array(columns)} "
+            query += f"{OOPDB.__format_array(columns)} "
         else:
-            self.query += "* "
-        self.query += f"FROM {table_name} "
+            query += "* "
+        query += f"FROM {table_name} "
+        self.__queue(query, tables=[table_name])
 
         return self
 
@@ -200,7 +1044,7 @@ class OOPDB:
                 count_expression = "*"
                 print("Can't return distinct count for '*' expression, please specify column name,\
                         as a result will be returned non distinct count")
-        self.query += f"SELECT COUNT({count_expression}) FROM {table_name} "
+        self.__queue(f"SELECT COUNT({count_expression}) FROM {table_name} ", tables=[table_name])
         return self
 
     def inner_join(self, table : str, table_column : str, target_table_column : str) -> 'OOPDB':
@@ -215,6 +1059,37 @@ class OOPDB:
             The name for the target table column on which joining will be applied
         '''
         self.query += f"INNER JOIN {table} ON {table_column} = {table}.{target_table_column} "
+        self.predicate_columns += [(self.tables[0] if "." not in table_column and len(self.tables) > 0 else None, table_column),
+                                   (table, target_table_column)]
+        self.tables.append(table)
+        self.__mark_filter_position()
+        return self
+
+    def group_by(self, columns : List[str]) -> 'OOPDB':
+        '''
+        Adds to the queue grouping command, must be added after where command if any and before ordering
+
+        Rows with the same values of the given columns are merged into one row,
+        other selected columns have to be aggregated, see Aggregate
+
+        columns : List[str], required
+            List of column names to group rows by
+        '''
+        self.query += f"GROUP BY {OOPDB.__format_array(columns)} "
+        self.has_grouping = True
+        return self
+
+    def having(self, expression : Expression) -> 'OOPDB':
+        '''
+        Adds to the queue condition for groups, must be added right after group by command
+
+        expression : Expression, required
+            Expression for filtering groups, can use aggregates (see Aggregate) or their aliases as column names
+        '''
+        if not self.has_grouping:
+            raise Exception("Having requires group by command to be queued before")
+        self.query += f"HAVING {expression.expression} "
+        self.parameters += expression.parameters
         return self
 
     def order_by(self, columns : List[str], orders : List[OrderingTypes]) -> 'OOPDB':
@@ -235,8 +1110,69 @@ class OOPDB:
             column_orders.append(f"{column} {order.value}")
 
         self.query += f"ORDER BY {OOPDB.__format_array(column_orders)} "
+        self.ordering = list(zip(columns, orders))
+        return self
+
+    def limit(self, count : int) -> 'OOPDB':
+        '''
+        Adds to the queue limit command, must be added after ordering if any
+
+        count : int, required
+            Maximum count of rows in the result
+        '''
+        self.query += "LIMIT ? "
+        self.parameters.append(count)
+        self.has_limit = True
+        return self
+
+    def offset(self, count : int) -> 'OOPDB':
+        '''
+        Adds to the queue offset command, must be added after limit if any
+
+        Skipped rows still have to be read by the data base, so for deep pages use page_after instead
+
+        count : int, required
+            Count of rows to be skipped from the start of the result
+        '''
+        # sqlite supports offset only together with limit, negative limit means no limit
+        if not self.has_limit:
+            self.query += "LIMIT -1 "
+            self.has_limit = True
+        self.query += "OFFSET ? "
+        self.parameters.append(count)
         return self
 
+    def page_after(self, last_key : Any, size : int) -> 'OOPDB':
+        '''
+        Adds to the queue keyset pagination commands, must be added right after order by command
+
+        Selects the page of rows that go after the row with the given key in the ordering,
+        so the data base seeks to the page start by ordering columns instead of skipping rows like offset does.
+        Ordering columns must identify rows uniquely and must have the same order type
+
+        last_key : Any, required
+            Values of ordering columns for the last row of the previous page, single value for one ordering column
+            or tuple of values for several columns, None for the first page
+        size : int, required
+            Maximum count of rows in the page
+        '''
+        if len(self.ordering) == 0:
+            raise Exception("Page after requires order by command to be queued before")
+        orders = set(order for _, order in self.ordering)
+        if len(orders) != 1:
+            raise Exception(f"Page after requires the same order type for all ordering columns, but {self.ordering} were given")
+
+        if last_key is not None:
+            if not isinstance(last_key, (tuple, list)):
+                last_key = (last_key,)
+            if len(last_key) != len(self.ordering):
+                raise Exception(f"Page after key {last_key} doesn't match ordering columns {self.ordering}")
+            operation = ">" if orders.pop() == OrderingTypes.ASCENDING else "<"
+            columns = OOPDB.__format_array(column for column, _ in self.ordering)
+            condition = f"({columns}) {operation} ({OOPDB.__format_placeholders(len(last_key))})"
+            self.__add_condition(condition, [adapt_value(value) for value in last_key])
+        return self.limit(size)
+
     def update(self, table_name : str, columns : List[str], values : List[Any]) -> 'OOPDB':
         '''
         Adds to the queue update command
@@ -259,8 +1195,8 @@ class OOPDB:
         if len(columns) == 0:
             return self
 
-        update_condition = ', '.join(f"{column} = {wrap_value(value)}" for column, value in zip(columns, values))
-        self.query += f"UPDATE {table_name} SET {update_condition} "
+        update_condition = ', '.join(f"{column} = ?" for column in columns)
+        self.__queue(f"UPDATE {table_name} SET {update_condition} ", [adapt_value(value) for value in values], [table_name])
         return self
 
     def delete(self, table_name : str) -> 'OOPDB':
@@ -270,7 +1206,7 @@ class OOPDB:
         table_name : str, required
             The name of the table that will be modified with delete command
         '''
-        self.query += f"DELETE FROM {table_name} "
+        self.__queue(f"DELETE FROM {table_name} ", tables=[table_name])
         return self
 
     def where(self, expression : Expression) -> 'OOPDB':
@@ -280,13 +1216,542 @@ class OOPDB:
         expression : Expression, required
             Expression for filtering
         '''
+        self.where_position = (len(self.query), len(self.parameters))
         self.query += f"WHERE {expression.expression} "
+        self.parameters += expression.parameters
+        self.where_expression = expression
+        self.predicate_columns += [(None, column) for column in expression.columns]
         return self
 
+    def _take_statements(self) -> List[Statement]:
+        '''
+        Returns all queued statements and clears the queue
+        '''
+        self.__complete_statement()
+        statements = self.statements
+        self.statements = []
+        return statements
+
+    def __queue(self, query : str, parameters : List[Any] = [], tables : List[str] = []) -> None:
+        '''
+        Starts new statement in the queue, the statement that was built before is considered completed
+
+        query : str, required
+            Beginning of the new statement query with '?' placeholders for values
+        parameters : List[Any], optional
+            Values for the placeholders in the query
+        tables : List[str], optional
+            Names of the tables that are read or modified by the statement
+        '''
+        self.__complete_statement()
+        self.query = query
+        self.parameters = list(parameters)
+        self.tables = list(tables)
+        self.__mark_filter_position()
+
+    def __mark_filter_position(self) -> None:
+        '''
+        Remembers the end of the statement part where condition can be inserted (before grouping, ordering etc)
+        '''
+        self.filter_position = (len(self.query), len(self.parameters))
+
+    def __add_condition(self, condition : str, parameters : List[Any]) -> None:
+        '''
+        Adds condition to the statement that is being built
+
+        If where command was already added the condition is combined with its expression by 'and',
+        otherwise new where command is inserted to the filter position of the statement
+        '''
+        if self.where_expression is not None:
+            query_position, parameters_position = self.where_position
+            old_where = f"WHERE {self.where_expression.expression} "
+            new_where = f"WHERE ({self.where_expression.expression}) AND {condition} "
+            parameters = self.where_expression.parameters + parameters
+            replaced_parameters_cnt = len(self.where_expression.parameters)
+            replaced_query_length = len(old_where)
+        else:
+            query_position, parameters_position = self.filter_position
+            new_where = f"WHERE {condition} "
+            replaced_parameters_cnt = 0
+            replaced_query_length = 0
+        self.query = self.query[:query_position] + new_where + self.query[query_position + replaced_query_length:]
+        self.parameters[parameters_position:parameters_position + replaced_parameters_cnt] = parameters
+
+    def __fetch_columns(self, statements : List[Statement]) -> dict:
+        '''
+        Executes given statements and returns result of the last one as columns, see RowsStyle.COLUMNS
+        '''
+        cursor = self.connection.cursor()
+        # plain tuples are enough for filling columns
+        cursor.row_factory = None
+        query = ""
+        # commands that modify data are committed together like execute does
+        is_read_only = all(statement.is_select for statement in statements)
+        try:
+            with contextlib.nullcontext() if is_read_only else self.transaction():
+                for statement_id, (query, parameters, _) in enumerate(statements):
+                    start = self.__run(cursor, query, parameters)
+                    if statement_id + 1 < len(statements):
+                        self.__trace(query, len(parameters), cursor.rowcount, time.perf_counter() - start)
+                column_names = OOPDB.__column_names(cursor)
+                columns = [[] for _ in column_names]
+                while True:
+                    rows = cursor.fetchmany(1000)
+                    if len(rows) == 0:
+                        break
+                    for column, values in zip(columns, zip(*rows)):
+                        column.extend(values)
+                if len(statements) > 0:
+                    self.__trace(query, len(parameters), len(columns[0]) if len(columns) > 0 else 0, time.perf_counter() - start)
+        except sqlite3.Error as e:
+            print(f"The error '{e}' occurred for query '{query}'")
+            return {}
+        finally:
+            cursor.close()
+
+        if not is_read_only:
+            self.__invalidate_cache(table for statement in statements if not statement.is_select for table in statement.tables)
+            self.__invalidate_schema(statements)
+        return _make_columns(column_names, columns)
+
+    @staticmethod
+    def __column_names(cursor : sqlite3.Cursor) -> List[str]:
+        if cursor.description is None:
+            return []
+        return [description[0] for description in cursor.description]
+
+    @staticmethod
+    def __connection_pragmas(profile : Optional[Union[Profile, str]], pragmas : dict) -> dict:
+        '''
+        Returns settings of the profile overridden by explicitly given settings in the order they have to be applied
+        '''
+        unsupported_pragmas = [pragma for pragma in pragmas if pragma not in SUPPORTED_PRAGMAS]
+        if len(unsupported_pragmas) > 0:
+            raise Exception(f"Unsupported connection settings {unsupported_pragmas}, supported are {SUPPORTED_PRAGMAS}")
+        values = {}
+        if profile is not None:
+            values.update(PROFILE_PRAGMAS[Profile(profile)])
+        values.update(pragmas)
+        result = {}
+        for pragma in SUPPORTED_PRAGMAS:
+            if pragma not in values:
+                continue
+            value = values[pragma]
+            # PRAGMA doesn't support parameters, so only plain values are allowed
+            if not isinstance(value, int) and not str(value).isalnum():
+                raise Exception(f"Wrong value '{value}' for connection setting '{pragma}'")
+            result[pragma] = value
+        return result
+
+    def __run(self, cursor : sqlite3.Cursor, query : str, parameters : Sequence[Any], many : bool = False) -> float:
+        '''
+        Executes the statement on the cursor, failed statements are traced
+
+        Returns the time when the execution was started for tracing
+        '''
+        start = time.perf_counter()
+        self.__is_running_statement = True
+        try:
+            if many:
+                cursor.executemany(query, parameters)
+            else:
+                cursor.execute(query, parameters)
+        except sqlite3.Error as e:
+            parameters_count = sum(len(row) for row in parameters) if many else len(parameters)
+            self.__trace(query, parameters_count, -1, time.perf_counter() - start, str(e))
+            raise
+        finally:
+            self.__is_running_statement = False
+        return start
+
+    def __trace(self, query : str, parameters_count : int, rows_count : int, duration : Optional[float], error : Optional[str] = None) -> None:
+        if self.tracer is not None:
+            self.tracer(TraceEvent(query, parameters_count, rows_count, duration, OOPDB.__call_site(), error))
+
+    def __on_sqlite_trace(self, query : str) -> None:
+        # statements executed by OOPDB are traced with timing separately
+        if not self.__is_running_statement:
+            self.__trace(query, 0, -1, None)
+
+    @staticmethod
+    def __call_site() -> str:
+        '''
+        Returns the place of the first frame in the call stack that is outside of the oopdb package and contextlib
+        '''
+        package_path = os.path.dirname(os.path.abspath(__file__))
+        frame = sys._getframe(1)
+        while frame is not None:
+            file_name = frame.f_code.co_filename
+            if not file_name.startswith(package_path) and not file_name.endswith("contextlib.py"):
+                return f"{file_name}:{frame.f_lineno} in {frame.f_code.co_name}"
+            frame = frame.f_back
+        return ""
+
+    def __table_predicate_columns(self, table : str, tables : Sequence[str], predicate_columns : List[Tuple[Optional[str], str]]) -> List[str]:
+        '''
+        Returns columns of the table that are used by the conditions of the statement
+
+        table : str, required
+            Name of the table
+        tables : Sequence[str], required
+            Names of all tables of the statement
+        predicate_columns : List[Tuple[Optional[str], str]], required
+            Pairs of the table name (None if unknown) and the column name, the column name can be qualified by the table name
+        '''
+        self.cursor.execute(f"PRAGMA table_info({table})")
+        table_columns = [row[1].lower() for row in self.cursor.fetchall()]
+        result = []
+        for column_table, column in predicate_columns:
+            if "." in column:
+                column_table, column = column.split(".", 1)
+            elif column_table is None and len(tables) == 1:
+                column_table = tables[0]
+            if column_table is not None and column_table.lower() != table.lower():
+                continue
+            if column.lower() in table_columns and column not in result:
+                result.append(column)
+        return result
+
+    def __check_auto_snapshot(self) -> None:
+        '''
+        Makes the snapshot if auto snapshot is enabled and its interval has passed
+        '''
+        if self.auto_snapshot is None or self.transaction_depth > 0:
+            return
+        if time.monotonic() - self.auto_snapshot["last_time"] >= self.auto_snapshot["interval"]:
+            self.snapshot(self.auto_snapshot["path"], self.auto_snapshot["pages_per_step"])
+
+    def __invalidate_cache(self, tables : Iterable[str]) -> None:
+        if self.result_cache is not None:
+            self.result_cache.invalidate(tables)
+
+    def __drop_indexes(self, table_name : str) -> List[str]:
+        '''
+        Drops not unique indexes of the table created by create index commands,
+        unique indexes are kept because they are constraints
+
+        Returns commands that create dropped indexes
+        '''
+        self.cursor.execute("SELECT master.name, master.sql FROM sqlite_master AS master "
+                            "INNER JOIN PRAGMA_INDEX_LIST(?) AS list ON list.name = master.name "
+                            "WHERE master.type = 'index' AND master.sql IS NOT NULL AND list.\"unique\" = 0", [table_name])
+        indexes = [(row[0], row[1]) for row in self.cursor.fetchall()]
+        with self.transaction():
+            for index_name, _ in indexes:
+                self.cursor.execute(f"DROP INDEX {index_name}")
+        self.schema.invalidate()
+        return [sql for _, sql in indexes]
+
+    def __create_indexes(self, commands : List[str]) -> None:
+        '''
+        Creates indexes by the given commands, each index in its own transaction,
+        so one failed index doesn't prevent creation of others. Exception is raised if some index isn't created
+        '''
+        errors = []
+        for command in commands:
+            try:
+                with self.transaction():
+                    self.cursor.execute(command)
+            except sqlite3.Error as e:
+                errors.append(f"The error '{e}' occurred for query '{command}'")
+        if len(commands) > 0:
+            self.schema.invalidate()
+        if len(errors) > 0:
+            raise Exception("Deferred indexes weren't created: " + "; ".join(errors))
+
+    def __write_chunks(self, table_name : str, query : str, rows : Iterable[Any], chunk_size : int,
+                       adapt_row : Callable[[Any], List[Any]], write_chunk : Callable[[List[List[Any]]], Tuple[Any, int]]) -> Iterator[Any]:
+        '''
+        Writes rows to the table by chunks for bulk commands
+
+        Rows are taken lazily and converted to query parameters by adapt_row, each chunk is written by write_chunk
+        in its own transaction (savepoint if called inside of the transaction).
+        write_chunk returns the result for the chunk and count of affected rows for tracing
+
+        Yields results of written chunks, if some chunk fails the error is printed and writing stops
+        '''
+        rows = iter(rows)
+        try:
+            while True:
+                chunk = [adapt_row(row) for row in itertools.islice(rows, chunk_size)]
+                if len(chunk) == 0:
+                    return
+                with self.transaction():
+                    start = time.perf_counter()
+                    result, rows_count = write_chunk(chunk)
+                    self.__trace(query, sum(len(row) for row in chunk), rows_count, time.perf_counter() - start)
+                self.__invalidate_cache([table_name])
+                self.__check_auto_snapshot()
+                yield result
+        except sqlite3.Error as e:
+            print(f"The error '{e}' occurred for query '{query}'")
+
+    def __insert_chunks(self, table_name : str, columns : List[str], rows : Iterable[Any], chunk_size : int,
+                        adapt_row : Callable[[Any], List[Any]]) -> Iterator[List[Optional[int]]]:
+        '''
+        Inserts rows to the table by chunks, see __write_chunks
+
+        With RETURNING (sqlite 3.35 and newer) rows are inserted one by one, because executemany discards returned rows.
+        Older versions restore sequential ids assigned in one executemany call from the last inserted row id,
+        if some rows have explicit row ids the assigned ids aren't sequential, so such chunk is inserted row by row
+
+        Yields row ids of each inserted chunk, None for tables WITHOUT ROWID
+        '''
+        query = OOPDB.__insert_query(table_name, columns)
+        has_rowid = self.__has_rowid(table_name)
+        is_returning = has_rowid and sqlite3.sqlite_version_info >= (3, 35, 0)
+        if is_returning:
+            query += " RETURNING rowid"
+        rowid_column = self.__rowid_column_index(table_name, columns) if has_rowid else None
+        def write_chunk(chunk : List[List[Any]]) -> Tuple[List[Optional[int]], int]:
+            if not has_rowid:
+                self.__run(self.cursor, query, chunk, many=True)
+                return [None] * len(chunk), len(chunk)
+            row_ids = []
+            if is_returning:
+                for row in chunk:
+                    self.__run(self.cursor, query, row)
+                    row_ids += [returned[0] for returned in self.cursor.fetchall()]
+            elif rowid_column is not None and any(row[rowid_column] is not None for row in chunk):
+                for row in chunk:
+                    self.__run(self.cursor, query, row)
+                    row_ids.append(self.cursor.lastrowid)
+            else:
+                self.__run(self.cursor, query, chunk, many=True)
+                last_row_id = self.last_row_id()
+                row_ids = list(range(last_row_id - len(chunk) + 1, last_row_id + 1))
+            return row_ids, len(chunk)
+        return self.__write_chunks(table_name, query, rows, chunk_size, adapt_row, write_chunk)
+
+    @staticmethod
+    def __insert_query(table_name : str, columns : List[str]) -> str:
+        if len(columns) == 0:
+            return f"INSERT INTO {table_name} DEFAULT VALUES"
+        return f"INSERT INTO {table_name} ({OOPDB.__format_array(columns)}) VALUES ({OOPDB.__format_placeholders(len(columns))})"
+
+    def __has_rowid(self, table_name : str) -> bool:
+        '''
+        Tells if the table has rowid, tables created WITHOUT ROWID don't have it
+        '''
+        self.cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ? COLLATE NOCASE", [table_name])
+        row = self.cursor.fetchone()
+        return row is None or row[0] is None or re.search(r"\)\s*WITHOUT\s+ROWID\b", row[0], re.IGNORECASE) is None
+
+    def __invalidate_schema(self, statements : List[Statement]) -> None:
+        if self.schema is not None and any(statement.is_ddl for statement in statements):
+            self.schema.invalidate()
+
+    def __rowid_column_index(self, table_name : str, columns : List[str]) -> Optional[int]:
+        '''
+        Returns index of the column in 'columns' that is alias for the table's rowid, if there is no such column returns None
+        '''
+        primary_key = self.schema.primary_key(table_name)
+        if primary_key is None or primary_key.name not in columns:
+            return None
+        return columns.index(primary_key.name)
+
+    def __complete_statement(self) -> None:
+        if self.query:
+            self.statements.append(Statement(self.query.strip(), tuple(self.parameters), tuple(self.tables)))
+        self.query = ""
+        self.parameters = []
+        self.tables = []
+        self.filter_position = (0, 0)
+        self.where_position = (0, 0)
+        self.where_expression = None
+        self.predicate_columns = []
+        self.ordering = []
+        self.has_grouping = False
+        self.has_limit = False
+
+    @staticmethod
+    def __row_converter(rows_style : RowsStyle, cursor : sqlite3.Cursor) -> Callable[[sqlite3.Row], Any]:
+        '''
+        Returns function that converts sqlite row of the executed cursor to the row with the given style
+        '''
+        if rows_style == RowsStyle.DICTIONARY:
+            return dict
+        if rows_style == RowsStyle.RECORD:
+            return record_class(tuple(OOPDB.__column_names(cursor)))._make
+        return tuple
+
     @staticmethod
     def __format_array(columns : List[str]) -> str:
         return ', '.join(str(column) for column in columns)
 
     @staticmethod
-    def __format_values(values : List[Any]) -> str:
-        return ', '.join(wrap_value(value) for value in values)
\ No newline at end of file
+    def __format_placeholders(count : int) -> str:
+        return ', '.join(['?'] * count)
+
+class Query:
+    '''
+    Prepared query that holds already built statements of the data base commands
+
+    The query is immutable, its statements are built once by OOPDB.prepare and can be executed many times.
+    Values of the parameters can be replaced on each execution without rebuilding of the query string,
+    so sqlite reuses compiled statement from its cache
+    '''
+
+    def __init__(self, db : OOPDB, statements : List[Statement]) -> None:
+        '''
+        db : OOPDB, required
+            The data base on which the query will be executed
+        statements : List[Statement], required
+            Statements of the query
+        '''
+        self.__db = db
+        self.__statements = tuple(statements)
+
+    @property
+    def statements(self) -> Tuple[Statement, ...]:
+        '''
+        Statements of the query
+        '''
+        return self.__statements
+
+    @property
+    def sql(self) -> str:
+        '''
+        Query string of all statements
+        '''
+        return "; ".join(statement.query for statement in self.__statements)
+
+    @property
+    def parameters(self) -> Tuple[Any, ...]:
+        '''
+        Parameters of all statements in the order of placeholders
+        '''
+        return tuple(parameter for statement in self.__statements for parameter in statement.parameters)
+
+    def bind(self, parameters : Sequence[Any]) -> 'Query':
+        '''
+        Creates new query with the same statements and new values for parameters
+
+        parameters : Sequence[Any], required
+            New values for all parameters of the query in the order of placeholders,
+            the count of the values must match the count of the query parameters
+        '''
+        if len(parameters) != len(self.parameters):
+            raise Exception(f"Query '{self.sql}' expects {len(self.parameters)} parameters but {len(parameters)} were given")
+        statements = []
+        parameters = [adapt_value(value) for value in parameters]
+        for statement in self.__statements:
+            statement_parameters_cnt = len(statement.parameters)
+            statements.append(statement._replace(parameters=tuple(parameters[:statement_parameters_cnt])))
+            parameters = parameters[statement_parameters_cnt:]
+        return Query(self.__db, statements)
+
+    def execute(self, parameters : Optional[Sequence[Any]] = None) -> bool:
+        '''
+        Executes the query, see OOPDB.execute
+
+        parameters : Sequence[Any], optional
+            New values for the query parameters, see bind
+        '''
+        return self.__db._execute_statements(self.__bound_statements(parameters))
+
+    def fetch(self, rows_style : RowsStyle = RowsStyle.TUPLE, parameters : Optional[Sequence[Any]] = None) -> List[Any]:
+        '''
+        Executes the query and returns the result rows, see OOPDB.fetch
+
+        rows_style - RowsStyle, optional
+            Defines how fetched rows will be look like
+        parameters : Sequence[Any], optional
+            New values for the query parameters, see bind
+        '''
+        return self.__db._fetch_statements(self.__bound_statements(parameters), rows_style)
+
+    def iter_rows(self, batch_size : int = 1000, rows_style : RowsStyle = RowsStyle.TUPLE, parameters : Optional[Sequence[Any]] = None) -> Iterator[Any]:
+        '''
+        Executes the query and returns generator over the result rows, see OOPDB.iter_rows
+
+        batch_size : int, optional, default 1000
+            Count of rows pulled from the data base at once
+        rows_style - RowsStyle, optional
+            Defines how fetched rows will be look like
+        parameters : Sequence[Any], optional
+            New values for the query parameters, see bind
+        '''
+        return self.__db._iter_rows(self.__bound_statements(parameters), batch_size, rows_style)
+
+    def __bound_statements(self, parameters : Optional[Sequence[Any]]) -> List[Statement]:
+        query = self if parameters is None else self.bind(parameters)
+        return list(query.statements)
+
+def _make_columns(column_names : List[str], columns : List[List[Any]]) -> dict:
+    '''
+    Creates result for RowsStyle.COLUMNS from the lists of column values
+    '''
+    if numpy is None:
+        return dict(zip(column_names, columns))
+    return {name : _column_array(values) for name, values in zip(column_names, columns)}
+
+def _column_array(values : List[Any]) -> Any:
+    '''
+    Creates numpy masked array for the column values, NULL values are masked
+    '''
+    not_null_values = [value for value in values if value is not None]
+    if len(not_null_values) == 0:
+        dtype, fill_value = object, None
+    elif all(isinstance(value, bool) for value in not_null_values):
+        dtype, fill_value = numpy.bool_, False
+    elif all(isinstance(value, int) and not isinstance(value, bool) for value in not_null_values):
+        dtype, fill_value = numpy.int64, 0
+    elif all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in not_null_values):
+        dtype, fill_value = numpy.float64, 0.0
+    else:
+        dtype, fill_value = object, None
+    if len(not_null_values) != len(values):
+        mask = numpy.array([value is None for value in values], dtype=numpy.bool_)
+        values = [fill_value if value is None else value for value in values]
+    else:
+        mask = numpy.zeros(len(values), dtype=numpy.bool_)
+    return numpy.ma.masked_array(numpy.array(values, dtype=dtype), mask=mask)
+
+def _scan_partition(db_path : str, statements : List[Statement]) -> Tuple[List[str], List[Tuple]]:
+    '''
+    Selects one partition for OOPDB.parallel_scan in the worker process
+
+    Returns column names and rows of the partition, sqlite3.Error isn't caught, so the scan fails with it
+    instead of merging incomplete partition
+    '''
+    connection = sqlite3.connect(f"file:{urllib.request.pathname2url(os.path.abspath(db_path))}?mode=ro",
+                                 detect_types=sqlite3.PARSE_DECLTYPES, uri=True)
+    try:
+        cursor = connection.cursor()
+        for query, parameters, _ in statements:
+            cursor.execute(query, parameters)
+        rows = cursor.fetchall()
+        return [description[0] for description in cursor.description], rows
+    finally:
+        connection.close()
+
+class _OrderKey:
+    '''
+    Sort key that compares values like sqlite does for the ORDER BY command with the given order types
+    '''
+    __slots__ = ("values", "orders")
+
+    def __init__(self, values : List[Any], orders : List[OrderingTypes]) -> None:
+        self.values = [_OrderKey.__sqlite_order_value(value) for value in values]
+        self.orders = orders
+
+    def __lt__(self, other : '_OrderKey') -> bool:
+        for value, other_value, order in zip(self.values, other.values, self.orders):
+            if value == other_value:
+                continue
+            if order == OrderingTypes.ASCENDING:
+                return value < other_value
+            return value > other_value
+        return False
+
+    @staticmethod
+    def __sqlite_order_value(value : Any) -> Tuple[int, Any]:
+        # sqlite orders NULL values first, then numbers, texts and blobs
+        if value is None:
+            return (0, 0)
+        if isinstance(value, (int, float)):
+            return (1, value)
+        if isinstance(value, str):
+            return (2, value)
+        return (3, value)
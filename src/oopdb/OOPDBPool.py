@@ -0,0 +1,158 @@
+import contextlib
+import queue
+import threading
+from typing import Any, Iterator
+from .OOPDB import OOPDB
+
+class OOPDBPool:
+    '''
+    Thread-safe pool of data base connections for multi-threaded applications
+
+    Each thread takes its own connection from the pool for the time it's needed,
+    connections are opened lazily up to the pool size and reused afterwards, so connection setup is paid only once
+    '''
+
+    def __init__(self, db_path : str, size : int = 5, timeout : float = None, **open_options : Any) -> None:
+        '''
+        db_path : str, required
+            The path to the data base
+        size : int, optional, default 5
+            Maximum count of connections opened by the pool
+        timeout : float, optional
+            Seconds to wait for a free connection when all connections are busy, waits forever if not set
+        open_options : Any, optional
+            Options passed to OOPDB.open for each connection, so all connections have the same setup
+        '''
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self.open_options = open_options
+        self.__idle = queue.LifoQueue()
+        self.__lock = threading.Lock()
+        self.__opened_cnt = 0
+        self.__busy_cnt = 0
+        self.__is_closed = False
+        self.__thread_state = threading.local()
+
+    @property
+    def idle_count(self) -> int:
+        '''
+        Count of opened connections that are waiting in the pool
+        '''
+        with self.__lock:
+            if self.__is_closed:
+                return 0
+        return self.__idle.qsize()
+
+    @property
+    def busy_count(self) -> int:
+        '''
+        Count of connections that are taken from the pool
+        '''
+        with self.__lock:
+            return self.__busy_cnt
+
+    @contextlib.contextmanager
+    def connection(self) -> Iterator[OOPDB]:
+        '''
+        Context manager that takes connection from the pool and returns it back on exit
+
+        Nested calls in the same thread return the same connection.
+        Queued commands and not finished transaction are discarded when the connection is returned
+        '''
+        db = getattr(self.__thread_state, "db", None)
+        if db is not None:
+            self.__thread_state.depth += 1
+            try:
+                yield db
+            finally:
+                self.__thread_state.depth -= 1
+            return
+
+        db = self.__acquire()
+        self.__thread_state.db = db
+        self.__thread_state.depth = 0
+        try:
+            yield db
+        finally:
+            self.__thread_state.db = None
+            self.__release(db)
+
+    def close(self) -> None:
+        '''
+        Closes all idle connections, busy connections are closed when they are returned to the pool.
+        Exception is raised for the threads that wait for a free connection or take it after the close
+        '''
+        with self.__lock:
+            self.__is_closed = True
+        while True:
+            try:
+                db = self.__idle.get_nowait()
+            except queue.Empty:
+                break
+            if db is not None:
+                self.__close(db)
+        # None wakes up waiting threads, each of them puts it back for the next one
+        self.__idle.put(None)
+
+    def __acquire(self) -> OOPDB:
+        with self.__lock:
+            if self.__is_closed:
+                raise Exception(f"Pool for '{self.db_path}' is closed")
+        try:
+            db = self.__idle.get_nowait()
+            if db is None:
+                self.__raise_closed()
+        except queue.Empty:
+            db = None
+        if db is None:
+            with self.__lock:
+                if self.__is_closed:
+                    raise Exception(f"Pool for '{self.db_path}' is closed")
+                can_open = self.__opened_cnt < self.size
+                if can_open:
+                    self.__opened_cnt += 1
+            if can_open:
+                try:
+                    db = OOPDB().open(self.db_path, check_same_thread=False, **self.open_options)
+                except BaseException:
+                    with self.__lock:
+                        self.__opened_cnt -= 1
+                    raise
+            else:
+                try:
+                    db = self.__idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise Exception(f"No free connection in the pool for '{self.db_path}' after {self.timeout} seconds")
+                if db is None:
+                    self.__raise_closed()
+        with self.__lock:
+            self.__busy_cnt += 1
+        return db
+
+    def __raise_closed(self) -> None:
+        # None taken from the queue is put back for other waiting threads
+        self.__idle.put(None)
+        raise Exception(f"Pool for '{self.db_path}' is closed")
+
+    def __release(self, db : OOPDB) -> None:
+        db._take_statements()
+        # the transaction that wasn't finished by the user (e.g. not exited transaction context) is dropped
+        # with all its savepoints, so the next user gets the connection without pending changes
+        db.transaction_depth = 0
+        if db.connection.in_transaction:
+            db.connection.rollback()
+            if db.result_cache is not None:
+                db.result_cache.clear()
+        with self.__lock:
+            self.__busy_cnt -= 1
+            is_closed = self.__is_closed
+        if is_closed:
+            self.__close(db)
+        else:
+            self.__idle.put(db)
+
+    def __close(self, db : OOPDB) -> None:
+        db.close()
+        with self.__lock:
+            self.__opened_cnt -= 1
@@ -0,0 +1,119 @@
+import enum
+from typing import Iterator, List, NamedTuple
+
+class ScanPolicy(enum.Enum):
+    '''
+    Defines what explain does when the query scans the whole table that has more rows than the threshold
+        IGNORE
+            Full scans are only listed in QueryPlan.full_scans
+        WARN
+            Warning with index suggestions is issued by warnings module
+        RAISE
+            Exception with index suggestions is raised
+    '''
+    IGNORE = "ignore"
+    WARN = "warn"
+    RAISE = "raise"
+
+class QueryPlanNode:
+    '''
+    Step of the query plan, see QueryPlan
+    '''
+
+    def __init__(self, node_id : int, detail : str) -> None:
+        '''
+        node_id : int, required
+            Id of the step reported by sqlite
+        detail : str, required
+            Description of the step reported by sqlite, e.g. 'SCAN Table' or 'SEARCH Table USING INDEX ...'
+        '''
+        self.node_id = node_id
+        self.detail = detail
+        self.children = []
+
+    def walk(self) -> Iterator['QueryPlanNode']:
+        '''
+        Returns generator over the node and all its descendants in depth-first order
+        '''
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+class FullScan(NamedTuple):
+    '''
+    Scan of the whole table found in the query plan
+        table
+            Name of the scanned table
+        rows_count
+            Count of rows in the table counted up to max_scan_rows + 1 of OOPDB.explain, so it's the lower bound
+        columns
+            Columns of the table used by where and inner join conditions, the index on them can turn the scan into search,
+            empty if the query doesn't have conditions on the table
+    '''
+    table : str
+    rows_count : int
+    columns : List[str]
+
+    @property
+    def suggested_index(self) -> str:
+        '''
+        Returns the command that creates suggested index or empty string if there are no columns to index
+        '''
+        if len(self.columns) == 0:
+            return ""
+        return f"CREATE INDEX {self.table}_{'_'.join(self.columns)}_index ON {self.table} ({', '.join(self.columns)})"
+
+class QueryPlan:
+    '''
+    Result of EXPLAIN QUERY PLAN for the query, see OOPDB.explain
+    '''
+
+    def __init__(self, sql : str, rows : List[tuple]) -> None:
+        '''
+        sql : str, required
+            Explained query
+        rows : List[tuple], required
+            Rows (id, parent, notused, detail) returned by EXPLAIN QUERY PLAN
+        '''
+        self.sql = sql
+        self.nodes = []
+        self.full_scans = []
+        nodes = {}
+        for node_id, parent_id, _, detail in rows:
+            node = QueryPlanNode(node_id, detail)
+            nodes[node_id] = node
+            if parent_id in nodes:
+                nodes[parent_id].children.append(node)
+            else:
+                self.nodes.append(node)
+
+    def walk(self) -> Iterator[QueryPlanNode]:
+        '''
+        Returns generator over all steps of the plan in depth-first order
+        '''
+        for node in self.nodes:
+            yield from node.walk()
+
+    def scanned_tables(self) -> List[str]:
+        '''
+        Returns names of the tables that are scanned by the query without index search
+        '''
+        tables = []
+        for node in self.walk():
+            words = node.detail.split()
+            # older sqlite versions describe scans as 'SCAN TABLE <name>'
+            if len(words) > 1 and words[0] == "SCAN" and words[1] == "TABLE":
+                words = words[1:]
+            if len(words) > 1 and words[0] == "SCAN" and words[1] not in ("CONSTANT", "SUBQUERY"):
+                tables.append(words[1])
+        return tables
+
+    def __str__(self) -> str:
+        lines = ["QUERY PLAN"]
+        def add_nodes(nodes : List[QueryPlanNode], indent : str) -> None:
+            for node_id, node in enumerate(nodes):
+                is_last = node_id + 1 == len(nodes)
+                lines.append(f"{indent}{'`--' if is_last else '|--'}{node.detail}")
+                add_nodes(node.children, indent + ("   " if is_last else "|  "))
+        add_nodes(self.nodes, "")
+        return "\n".join(lines)
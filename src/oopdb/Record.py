@@ -0,0 +1,50 @@
+import collections
+import functools
+from typing import Any, Dict, Tuple, Union
+
+class RecordAccess:
+    '''
+    Access to record values by column names in addition to indices and attributes
+    '''
+    __slots__ = ()
+
+    def __getitem__(self, key : Union[int, slice, str]) -> Any:
+        if isinstance(key, str):
+            return tuple.__getitem__(self, self._column_indices[key])
+        return tuple.__getitem__(self, key)
+
+    # methods are prefixed by underscore like named tuple methods, so they don't shadow columns with the same names
+
+    def _keys(self) -> Tuple[str, ...]:
+        '''
+        Returns column names of the record
+        '''
+        return self._columns
+
+    def _asdict(self) -> Dict[str, Any]:
+        '''
+        Returns dictionary with column names as keys, unlike named tuple it uses original column names instead of renamed fields
+        '''
+        return dict(zip(self._columns, self))
+
+@functools.lru_cache(maxsize=256)
+def record_class(column_names : Tuple[str, ...]) -> type:
+    '''
+    Returns compact row class for the given column names, see RowsStyle.RECORD
+
+    The class is named tuple, so it has the same memory cost as tuple, values are available by index,
+    by attribute and by column name. Column names that can't be attribute names (e.g. 'COUNT(*)' or duplicated names)
+    are available as '_<index>' attributes. Classes are cached, so each query shape has only one class
+
+    column_names : Tuple[str, ...], required
+        Column names of the result in the order of values
+    '''
+    base = collections.namedtuple("Record", column_names, rename=True)
+    column_indices = {}
+    for index, name in enumerate(column_names):
+        column_indices.setdefault(name, index)
+    return type("Record", (RecordAccess, base), {
+        "__slots__": (),
+        "_columns": column_names,
+        "_column_indices": column_indices,
+    })
@@ -0,0 +1,106 @@
+import collections
+import sys
+from typing import Any, Hashable, Iterable, List, Optional
+
+class ResultCache:
+    '''
+    LRU cache for results of select commands
+
+    Each result is stored with names of the tables it depends on, so it can be invalidated when any of them
+    is modified. The cache is bounded by count of results and approximate size of results in bytes,
+    the least recently used results are evicted first
+    '''
+
+    def __init__(self, max_entries : int = 1024, max_bytes : int = 64 * 1024 * 1024) -> None:
+        '''
+        max_entries : int, optional, default 1024
+            Maximum count of cached results
+        max_bytes : int, optional, default 64MB
+            Maximum approximate size of all cached results in bytes, bigger results aren't cached at all
+        '''
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.size_bytes = 0
+        self.__entries = collections.OrderedDict()
+        self.__table_keys = collections.defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def get(self, key : Hashable) -> Optional[List[Any]]:
+        '''
+        Returns copy of the cached result list or None if there is no result for the key
+
+        Rows themselves are shared with the cache, so they must not be modified
+        '''
+        entry = self.__entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.__entries.move_to_end(key)
+        return list(entry[0])
+
+    def put(self, key : Hashable, tables : Iterable[str], rows : List[Any]) -> None:
+        '''
+        Stores the result for the key
+
+        key : Hashable, required
+            Key of the result, commonly query string with its parameters
+        tables : Iterable[str], required
+            Names of the tables the result depends on
+        rows : List[Any], required
+            Result rows
+        '''
+        size = ResultCache.__estimate_size(rows)
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        self.__remove(key)
+        tables = set(table.lower() for table in tables)
+        self.__entries[key] = (list(rows), tables, size)
+        self.size_bytes += size
+        for table in tables:
+            self.__table_keys[table].add(key)
+        while len(self.__entries) > self.max_entries or self.size_bytes > self.max_bytes:
+            self.__remove(next(iter(self.__entries)))
+
+    def invalidate(self, tables : Iterable[str]) -> None:
+        '''
+        Removes all results that depend on any of the given tables
+        '''
+        for table in tables:
+            for key in list(self.__table_keys.pop(table.lower(), ())):
+                self.__remove(key)
+
+    def clear(self) -> None:
+        '''
+        Removes all results, hit and miss counters are kept
+        '''
+        self.__entries.clear()
+        self.__table_keys.clear()
+        self.size_bytes = 0
+
+    def __remove(self, key : Hashable) -> None:
+        entry = self.__entries.pop(key, None)
+        if entry is None:
+            return
+        _, tables, size = entry
+        self.size_bytes -= size
+        for table in tables:
+            keys = self.__table_keys.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if len(keys) == 0:
+                    del self.__table_keys[table]
+
+    @staticmethod
+    def __estimate_size(rows : List[Any]) -> int:
+        size = sys.getsizeof(rows)
+        for row in rows:
+            size += sys.getsizeof(row)
+            values = row.values() if isinstance(row, dict) else row
+            for value in values:
+                size += sys.getsizeof(value)
+        return size
@@ -0,0 +1,158 @@
+import sqlite3
+import time
+from typing import Dict, List, Optional
+from .ColumnConfig import ColumnConfig, DataTypes, ForeignKey, PrimaryKey
+
+class SchemaCatalog:
+    '''
+    Cached description of the data base tables and their columns
+
+    The schema is loaded once on the first access and kept until it's changed.
+    OOPDB invalidates the catalog after DDL commands (create, drop, alter) passed through execute,
+    changes made by other connections are detected by PRAGMA schema_version
+    '''
+
+    def __init__(self, connection : sqlite3.Connection, max_staleness : float = 0.0) -> None:
+        '''
+        connection : sqlite3.Connection, required
+            Connection to the data base
+        max_staleness : float, optional, default 0.0
+            Seconds during which the schema version isn't checked again after the last check,
+            0 checks the version on each access, bigger values save a query on frequent accesses
+            but changes made by other connections can be noticed later
+        '''
+        self.connection = connection
+        self.max_staleness = max_staleness
+        self.schema_version = None
+        self.tables = {}
+        self.__checked_at = 0.0
+
+    def table_names(self) -> List[str]:
+        '''
+        Returns names of all tables of the data base
+        '''
+        return list(self.__loaded_tables().keys())
+
+    def has_table(self, table_name : str) -> bool:
+        return table_name.lower() in (name.lower() for name in self.__loaded_tables())
+
+    def columns(self, table_name : str) -> List[ColumnConfig]:
+        '''
+        Returns column configs of the table in the order of the table definition, empty list if there is no such table
+
+        Integer primary keys are PrimaryKey and columns with references are ForeignKey,
+        'is_indexed' and 'is_unique' options are set for the columns that have their own index
+        '''
+        tables = self.__loaded_tables()
+        if table_name in tables:
+            return tables[table_name]
+        for name, columns in tables.items():
+            if name.lower() == table_name.lower():
+                return columns
+        return []
+
+    def column_names(self, table_name : str) -> List[str]:
+        '''
+        Returns column names of the table, empty list if there is no such table
+        '''
+        return [column.name for column in self.columns(table_name)]
+
+    def column(self, table_name : str, column_name : str) -> Optional[ColumnConfig]:
+        '''
+        Returns column config of the table's column, None if there is no such column
+        '''
+        for column in self.columns(table_name):
+            if column.name.lower() == column_name.lower():
+                return column
+        return None
+
+    def primary_key(self, table_name : str) -> Optional[PrimaryKey]:
+        '''
+        Returns integer primary key of the table that is alias for rowid, None if the table doesn't have it
+        '''
+        for column in self.columns(table_name):
+            if isinstance(column, PrimaryKey):
+                return column
+        return None
+
+    def invalidate(self) -> None:
+        '''
+        Forces reloading of the schema on the next access
+        '''
+        self.schema_version = None
+
+    def refresh(self) -> None:
+        '''
+        Reloads the schema from the data base
+        '''
+        cursor = self.connection.cursor()
+        cursor.row_factory = None
+        self.schema_version = cursor.execute("PRAGMA schema_version").fetchone()[0]
+        self.__checked_at = time.monotonic()
+        tables = {}
+        cursor.execute("SELECT name, sql FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY rowid")
+        for table_name, sql in cursor.fetchall():
+            tables[table_name] = SchemaCatalog.__load_columns(cursor, table_name, sql or "")
+        self.tables = tables
+
+    def __loaded_tables(self) -> Dict[str, List[ColumnConfig]]:
+        if self.schema_version is None:
+            self.refresh()
+        elif time.monotonic() - self.__checked_at >= self.max_staleness:
+            schema_version = self.connection.execute("PRAGMA schema_version").fetchone()[0]
+            self.__checked_at = time.monotonic()
+            if schema_version != self.schema_version:
+                self.refresh()
+        return self.tables
+
+    @staticmethod
+    def __load_columns(cursor : sqlite3.Cursor, table_name : str, sql : str) -> List[ColumnConfig]:
+        '''
+        Restores column configs of the table from PRAGMA table_info, foreign_key_list and index_list
+        '''
+        table_info = cursor.execute("SELECT name, type, \"notnull\", pk FROM PRAGMA_TABLE_INFO(?) ORDER BY cid", [table_name]).fetchall()
+        references = {row[0] : (row[1], row[2]) for row in
+                      cursor.execute("SELECT \"from\", \"table\", \"to\" FROM PRAGMA_FOREIGN_KEY_LIST(?)", [table_name]).fetchall()}
+        primary_keys = [name for name, _, _, pk in table_info if pk > 0]
+
+        columns = []
+        for name, declared_type, not_null, pk in table_info:
+            data_type = SchemaCatalog.__data_type(declared_type)
+            if pk > 0 and len(primary_keys) == 1 and declared_type.upper() == DataTypes.INTEGER.value:
+                column = PrimaryKey(name, "AUTOINCREMENT" in sql.upper())
+            elif name in references:
+                reference_table, reference_column = references[name]
+                column = ForeignKey(name, reference_table, reference_column, False)
+                column.type = data_type
+                column.is_null = not not_null
+            else:
+                column = ColumnConfig(name, data_type, not not_null)
+            columns.append(column)
+
+        columns_by_name = {column.name : column for column in columns}
+        for index_name, is_unique, origin, is_partial in cursor.execute(
+                "SELECT name, \"unique\", origin, partial FROM PRAGMA_INDEX_LIST(?)", [table_name]).fetchall():
+            if origin == "pk" or is_partial:
+                continue
+            index_columns = cursor.execute("SELECT name FROM PRAGMA_INDEX_INFO(?)", [index_name]).fetchall()
+            if len(index_columns) == 1 and index_columns[0][0] in columns_by_name:
+                column = columns_by_name[index_columns[0][0]]
+                column.is_indexed = True
+                column.is_unique = column.is_unique or bool(is_unique)
+        return columns
+
+    @staticmethod
+    def __data_type(declared_type : str) -> DataTypes:
+        '''
+        Returns data type for the declared column type, types that aren't in DataTypes are mapped by sqlite affinity rules
+        '''
+        declared_type = declared_type.upper()
+        if declared_type in (data_type.value for data_type in DataTypes):
+            return DataTypes(declared_type)
+        if "INT" in declared_type:
+            return DataTypes.INTEGER
+        if "CHAR" in declared_type or "CLOB" in declared_type or "TEXT" in declared_type:
+            return DataTypes.TEXT
+        if declared_type == "" or "BLOB" in declared_type:
+            return DataTypes.BLOB
+        return DataTypes.REAL
@@ -0,0 +1,55 @@
+import logging
+import random
+from typing import NamedTuple, Optional
+
+class TraceEvent(NamedTuple):
+    '''
+    Information about the statement executed by OOPDB, see OOPDB.set_tracer
+        sql
+            Query string of the statement, with '?' placeholders for statements built by OOPDB
+            and with values for internal statements (transactions, settings etc)
+        parameters_count
+            Count of parameters bound to the statement
+        rows_count
+            Count of fetched rows for select commands or count of modified rows for other commands, -1 if unknown
+        duration
+            Seconds spent by sqlite for the statement including fetching rows, None for internal statements that aren't timed
+        call_site
+            Place in the caller's code where the statement was executed in the form '<file>:<line> in <function>'
+        error
+            Error message if the statement failed
+    '''
+    sql : str
+    parameters_count : int
+    rows_count : int
+    duration : Optional[float]
+    call_site : str
+    error : Optional[str] = None
+
+class SlowQueryLogger:
+    '''
+    Tracer that logs statements which took more time than the threshold, see OOPDB.set_tracer
+    '''
+
+    def __init__(self, threshold : float = 0.1, sample_rate : float = 1.0, logger : Optional[logging.Logger] = None) -> None:
+        '''
+        threshold : float, optional, default 0.1
+            Minimal duration of the statement in seconds to be logged
+        sample_rate : float, optional, default 1.0
+            Part of slow statements that will be logged, from 0 to 1, used to reduce logging for frequent statements
+        logger : logging.Logger, optional
+            Logger for slow statements, 'oopdb.slow_queries' logger is used by default
+        '''
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self.logger = logger if logger is not None else logging.getLogger("oopdb.slow_queries")
+        self.slow_count = 0
+
+    def __call__(self, event : TraceEvent) -> None:
+        if event.duration is None or event.duration < self.threshold:
+            return
+        self.slow_count += 1
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        self.logger.warning("Slow query took %.3f s (%d parameters, %d rows) at %s: %s",
+                            event.duration, event.parameters_count, event.rows_count, event.call_site, event.sql)
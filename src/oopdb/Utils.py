@@ -1,13 +1,113 @@
+import datetime
 from typing import Any, List, Tuple
 from prettytable import PrettyTable
+from .ColumnConfig import DataTypes
 
 def print_table(rows : List[Tuple], column_headers : List[str]) -> None:
     table = PrettyTable(column_headers)
     table.add_rows(rows)
     print(table)
 
-def wrap_value(value : Any) -> str:
-    res = str(value)
-    if isinstance(value, str) or isinstance(value, bool):
-        res = f"'{res}'"
-    return res
\ No newline at end of file
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+MICROSECOND = datetime.timedelta(microseconds=1)
+
+def adapt_value(value : Any) -> Any:
+    '''
+    Converts python value to the value that will be bound to the query parameter
+
+    Bool values are stored as integers 0 and 1, datetime values are stored as integer microseconds since epoch,
+    so they are restored exactly, naive datetime values are considered as UTC.
+    bytearray and memoryview values are converted to bytes, so bound parameters are hashable
+    '''
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (bytearray, memoryview)):
+        return bytes(value)
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=datetime.timezone.utc)
+        return (value - EPOCH) // MICROSECOND
+    return value
+
+def convert_bool(value : bytes) -> bool:
+    '''
+    Converts value stored in BOOL column to python bool
+
+    Values stored as text by older versions are supported too
+    '''
+    if value in (b"1", b"True"):
+        return True
+    if value in (b"0", b"False"):
+        return False
+    raise ValueError(f"Wrong value {value} for BOOL type")
+
+def convert_timestamp(value : bytes) -> datetime.datetime:
+    '''
+    Converts value stored in TIMESTAMP column to python UTC datetime
+
+    Values are stored as integer microseconds since epoch, values stored as ISO text are supported too
+    '''
+    try:
+        return EPOCH + int(value) * MICROSECOND
+    except ValueError:
+        res = datetime.datetime.fromisoformat(value.decode())
+        return res if res.tzinfo is not None else res.replace(tzinfo=datetime.timezone.utc)
+
+def format_literal(value : Any) -> str:
+    '''
+    Renders value as SQL literal
+
+    Used only where sqlite doesn't allow parameters, e.g. partial index conditions
+    '''
+    value = adapt_value(value)
+    if value is None:
+        return "NULL"
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    if isinstance(value, bytes):
+        return f"X'{value.hex()}'"
+    return str(value)
+
+def coerce_value(value : Any, data_type : DataTypes) -> Any:
+    '''
+    Converts value read from the text file (CSV, JSON) to the python value of the given data type
+
+    Empty strings are None for all types except TEXT. BOOL accepts 1/0, true/false, yes/no,
+    TIMESTAMP accepts seconds since epoch and ISO strings, BLOB accepts hex strings.
+    ValueError is raised if the value can't be converted
+    '''
+    if value is None:
+        return None
+    if isinstance(value, str) and value == "" and data_type != DataTypes.TEXT:
+        return None
+    if data_type == DataTypes.TEXT:
+        return value if isinstance(value, str) else str(value)
+    if data_type == DataTypes.INTEGER:
+        if isinstance(value, str):
+            try:
+                return int(value)
+            except ValueError:
+                value = float(value)
+        if isinstance(value, float) and not value.is_integer():
+            raise ValueError(f"Wrong value {value} for INTEGER type")
+        return int(value)
+    if data_type == DataTypes.REAL:
+        return float(value)
+    if data_type == DataTypes.BOOL:
+        if isinstance(value, (bool, int)):
+            return bool(value)
+        if str(value).strip().lower() in ("1", "true", "t", "yes", "y"):
+            return True
+        if str(value).strip().lower() in ("0", "false", "f", "no", "n"):
+            return False
+        raise ValueError(f"Wrong value {value} for BOOL type")
+    if data_type == DataTypes.TIMESTAMP:
+        if isinstance(value, (int, float)):
+            return datetime.datetime.fromtimestamp(value, datetime.timezone.utc)
+        try:
+            return datetime.datetime.fromtimestamp(float(value), datetime.timezone.utc)
+        except ValueError:
+            return datetime.datetime.fromisoformat(value)
+    if data_type == DataTypes.BLOB:
+        return value if isinstance(value, bytes) else bytes.fromhex(value)
+    return value
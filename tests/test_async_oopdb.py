@@ -0,0 +1,77 @@
+from oopdb.AsyncOOPDB import AsyncOOPDB
+from oopdb.OOPDB import RowsStyle, OrderingTypes
+from oopdb.ColumnConfig import ColumnConfig, DataTypes
+from oopdb.Expression import Expression, Operation
+from .test_oopdb import TempFileHolder
+import os
+import asyncio
+import unittest
+
+class TestAsyncOOPDB(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.holder = TempFileHolder("temp_async.db")
+        self.db = AsyncOOPDB().open(self.holder.filename, workers=2)
+        self.table_name = "TestTable"
+        self.int_column = ColumnConfig("Id", DataTypes.INTEGER, False)
+        self.text_column = ColumnConfig("Text", DataTypes.TEXT, False)
+        self.assertTrue(await self.db.create_table(self.table_name, [self.int_column, self.text_column]).execute())
+        rows = [[row_id, f"Row{row_id}"] for row_id in range(100)]
+        await self.db.insert_many(self.table_name, [self.int_column.name, self.text_column.name], rows)
+
+    async def asyncTearDown(self):
+        self.db.close()
+
+    async def test_fetch(self):
+        rows = await self.db.select(self.table_name).where(Expression(self.int_column.name, Operation.LESS_THAN, 3)).fetch(RowsStyle.DICTIONARY)
+        self.assertListEqual(rows, [{"Id": row_id, "Text": f"Row{row_id}"} for row_id in range(3)])
+
+    async def test_concurrent_queries(self):
+        first = self.db.select_count(self.table_name).fetch()
+        second = self.db.select(self.table_name, [self.text_column.name]).where(Expression(self.int_column.name, Operation.EQUAL, 5)).fetch()
+        query = self.db.select(self.table_name, [self.int_column.name]).where(Expression(self.text_column.name, Operation.EQUAL, "Row0")).prepare()
+        results = await asyncio.gather(first, second, query.fetch(), query.fetch(parameters=["Row7"]))
+        self.assertListEqual(results, [[(100,)], [("Row5",)], [(0,)], [(7,)]])
+
+    async def test_stream(self):
+        rows = []
+        async for row in self.db.select(self.table_name, [self.int_column.name]).order_by([self.int_column.name], [OrderingTypes.DESCENDING]).stream(batch_size=7):
+            rows.append(row[0])
+        self.assertListEqual(rows, list(reversed(range(100))))
+
+    async def test_run(self):
+        def delete_in_transaction(db):
+            with db.transaction():
+                db.delete(self.table_name).where(Expression(self.int_column.name, Operation.GREATER_THAN_OR_EQUAL, 50)).execute()
+            return db.select_count(self.table_name).fetch()[0][0]
+        self.assertEqual(await self.db.run(delete_in_transaction), 50)
+        with self.assertRaises(Exception):
+            self.db.transaction()
+
+    async def test_inherited_commands(self):
+        settings = await self.db.settings()
+        self.assertIn("journal_mode", settings)
+
+        self.assertEqual(await self.db.migrate_bool_columns(), 0)
+
+        rows = await self.db.parallel_scan(self.table_name, [self.int_column.name], order_columns=[self.int_column.name],
+                                           orders=[OrderingTypes.DESCENDING], workers=2)
+        self.assertListEqual(rows, [(row_id,) for row_id in reversed(range(100))])
+
+        snapshot_holder = TempFileHolder("temp_async_snapshot.db")
+        self.assertTrue(await self.db.snapshot(snapshot_holder.filename))
+        self.assertTrue(os.path.exists(snapshot_holder.filename))
+        snapshot_db = AsyncOOPDB().open(snapshot_holder.filename)
+        try:
+            self.assertListEqual(await snapshot_db.select_count(self.table_name).fetch(), [(100,)])
+        finally:
+            snapshot_db.close()
+
+        with self.assertRaises(Exception):
+            self.db.open_in_memory()
+        with self.assertRaises(Exception):
+            self.db.enable_result_cache()
+        with self.assertRaises(Exception):
+            self.db.enable_auto_snapshot(snapshot_holder.filename, 1.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,49 +1,58 @@
 from oopdb.Expression import Expression, Operation
+import json
 import unittest
 
 class TestSimpleExpression(unittest.TestCase):
     def test_equality(self):
         exp = Expression("Column", Operation.EQUAL, "123")
-        expected_expression = "Column = '123'"
+        expected_expression = "Column = ?"
         self.assertEqual(exp.expression, expected_expression)
+        self.assertListEqual(exp.parameters, ["123"])
 
     def test_less(self):
         exp = Expression("Column", Operation.LESS_THAN, 123)
-        expected_expression = "Column < 123"
+        expected_expression = "Column < ?"
         self.assertEqual(exp.expression, expected_expression)
+        self.assertListEqual(exp.parameters, [123])
 
     def test_greater(self):
         exp = Expression("Column", Operation.GREATER_THAN, 123)
-        expected_expression = "Column > 123"
+        expected_expression = "Column > ?"
         self.assertEqual(exp.expression, expected_expression)
+        self.assertListEqual(exp.parameters, [123])
 
     def test_greater_or_equal(self):
         exp = Expression("Column", Operation.GREATER_THAN_OR_EQUAL, 123)
-        expected_expression = "Column >= 123"
+        expected_expression = "Column >= ?"
         self.assertEqual(exp.expression, expected_expression)
+        self.assertListEqual(exp.parameters, [123])
 
     def test_less_or_equal(self):
         exp = Expression("Column", Operation.LESS_THAN_OR_EQUAL, "123")
-        expected_expression = "Column <= '123'"
+        expected_expression = "Column <= ?"
         self.assertEqual(exp.expression, expected_expression)
+        self.assertListEqual(exp.parameters, ["123"])
 
     def test_not_equal(self):
         exp = Expression("Column", Operation.NOT_EQUAL, "123")
-        expected_expression = "Column <> '123'"
+        expected_expression = "Column <> ?"
         self.assertEqual(exp.expression, expected_expression)
+        self.assertListEqual(exp.parameters, ["123"])
 
     def test_in(self):
         exp_in_good = Expression("ColumnIn", Operation.IN, [1,2,3])
-        expected_expression = "ColumnIn IN (1, 2, 3)"
+        expected_expression = "ColumnIn IN (?, ?, ?)"
         self.assertEqual(exp_in_good.expression, expected_expression)
+        self.assertListEqual(exp_in_good.parameters, [1, 2, 3])
 
         with self.assertRaises(Exception):
             exp_in_bad_type = Expression("ColumnIn", Operation.IN, "1 2 3")
 
     def test_between(self):
         exp_between_good = Expression("ColumnBetween", Operation.BETWEEN, (1, 10))
-        expected_expression = "ColumnBetween BETWEEN 1 AND 10"
+        expected_expression = "ColumnBetween BETWEEN ? AND ?"
         self.assertEqual(exp_between_good.expression, expected_expression)
+        self.assertListEqual(exp_between_good.parameters, [1, 10])
 
         with self.assertRaises(Exception):
             exp_between_bad_size = Expression("ColumnBetween", Operation.BETWEEN, (1, 10, 12))
@@ -53,16 +62,22 @@ class TestSimpleExpression(unittest.TestCase):
 
     def test_like(self):
         exp_like_good = Expression("ColumnLike", Operation.LIKE, "prefix_%")
-        expected_expression = "ColumnLike LIKE 'prefix_%'"
+        expected_expression = "ColumnLike LIKE ?"
         self.assertEqual(exp_like_good.expression, expected_expression)
+        self.assertListEqual(exp_like_good.parameters, ["prefix_%"])
         
         with self.assertRaises(Exception):
             exp_like_bad_type = Expression("ColumnLike", Operation.LIKE, 123)
 
     def test_not(self):
         exp_not = Expression.NOT(Expression("ColumnNot", Operation.EQUAL, "123"))
-        expected_expression = "NOT ColumnNot = '123'"
+        expected_expression = "NOT ColumnNot = ?"
         self.assertEqual(exp_not.expression, expected_expression)
+        self.assertListEqual(exp_not.parameters, ["123"])
+
+    def test_inline_expression(self):
+        exp = Expression("Column", Operation.IN, ["It's", 1, None])
+        self.assertEqual(exp.inline_expression(), "Column IN ('It''s', 1, NULL)")
 
 class TestCompositeExpression(unittest.TestCase):
     def test_or(self):
@@ -70,30 +85,36 @@ class TestCompositeExpression(unittest.TestCase):
         exp2 = Expression("Column2", Operation.IN, [1,2,3,5])
         exp3 = Expression("Column3", Operation.LESS_THAN, 50)
         exp4 = exp1.OR(exp2)
-        expected_expression = "Column1 = '123' OR Column2 IN (1, 2, 3, 5)"
+        expected_expression = "Column1 = ? OR Column2 IN (?, ?, ?, ?)"
         self.assertEqual(exp4.expression, expected_expression)
+        self.assertListEqual(exp4.parameters, ["123", 1, 2, 3, 5])
         exp5 = exp4.OR(exp3)
-        expected_expression = f"({expected_expression}) OR Column3 < 50"
+        expected_expression = f"{expected_expression} OR Column3 < ?"
         self.assertEqual(exp5.expression, expected_expression)
+        self.assertListEqual(exp5.parameters, ["123", 1, 2, 3, 5, 50])
 
     def test_and(self):
         exp1 = Expression("Column1", Operation.GREATER_THAN, "123")
         exp2 = Expression("Column2", Operation.BETWEEN, (1,5))
         exp3 = Expression("Column3", Operation.LIKE, "a%")
         exp4 = exp1.AND(exp2)
-        expected_expression = "Column1 > '123' AND Column2 BETWEEN 1 AND 5"
+        expected_expression = "Column1 > ? AND Column2 BETWEEN ? AND ?"
         self.assertEqual(exp4.expression, expected_expression)
+        self.assertListEqual(exp4.parameters, ["123", 1, 5])
         exp5 = exp4.AND(exp3)
-        expected_expression = f"({expected_expression}) AND Column3 LIKE 'a%'"
+        expected_expression = f"{expected_expression} AND Column3 LIKE ?"
         self.assertEqual(exp5.expression, expected_expression)
+        self.assertListEqual(exp5.parameters, ["123", 1, 5, "a%"])
 
     def test_not(self):
         exp1 = Expression("Column1", Operation.GREATER_THAN_OR_EQUAL, "123")
         exp2 = Expression("Column2", Operation.LESS_THAN_OR_EQUAL, "321")
         exp3 = Expression("Column3", Operation.NOT_EQUAL, "test")
         exp = Expression.NOT(exp3.AND(exp1.OR(exp2)))
-        expected_expression = "NOT (Column3 <> 'test' AND (Column1 >= '123' OR Column2 <= '321'))"
+        expected_expression = "NOT (Column3 <> ? AND (Column1 >= ? OR Column2 <= ?))"
         self.assertEqual(exp.expression, expected_expression)
+        self.assertListEqual(exp.parameters, ["test", "123", "321"])
+        self.assertListEqual(exp.columns, ["Column3", "Column1", "Column2"])
 
     def test_all_in_one(self):
         exp_eq = Expression("ColumnEqual", Operation.EQUAL, 123)
@@ -111,27 +132,87 @@ class TestCompositeExpression(unittest.TestCase):
                                     "NOT ("
                                             "("
                                                 "("
-                                                "ColumnGT > 12 OR "
-                                                "ColumnLT < 21"
+                                                "ColumnGT > ? OR "
+                                                "ColumnLT < ?"
                                                 ") AND "
                                                 "("
-                                                "ColumnGTEQ >= 23 OR "
-                                                "ColumnLTEQ <= 32"
+                                                "ColumnGTEQ >= ? OR "
+                                                "ColumnLTEQ <= ?"
                                                 ")"
                                             ") OR "
-                                            "ColumnEqual = 123"
+                                            "ColumnEqual = ?"
                                         ")"
                                     ") OR "
-                                    "ColumnNEQ <> 0"
+                                    "ColumnNEQ <> ?"
                                 ") AND "
                                 "("
-                                "("
-                                "ColumnBetween BETWEEN 123 AND 321 OR "
-                                "ColumnIn IN (1, 2, 3, 5, 8, 13)"
-                                ") OR "
-                                "ColumnLike LIKE 'like%'"
+                                "ColumnBetween BETWEEN ? AND ? OR "
+                                "ColumnIn IN (?, ?, ?, ?, ?, ?) OR "
+                                "ColumnLike LIKE ?"
                                 ")")
         self.assertEqual(all_in_one_exp.expression, expected_expression)
+        expected_parameters = [12, 21, 23, 32, 123, 0, 123, 321, 1, 2, 3, 5, 8, 13, "like%"]
+        self.assertListEqual(all_in_one_exp.parameters, expected_parameters)
+
+class TestExpressionNormalization(unittest.TestCase):
+    def test_flatten_long_chain(self):
+        exp = Expression("Column", Operation.EQUAL, 0)
+        for value in range(1, 5000):
+            exp = exp.OR(Expression("Column", Operation.EQUAL, value))
+        self.assertEqual(exp.expression, " OR ".join(["Column = ?"] * 5000))
+        self.assertListEqual(exp.parameters, list(range(5000)))
+        self.assertIs(exp.compile(), exp.compile())
+
+    def test_duplicates(self):
+        exp = Expression("Column", Operation.IN, [3, 1, 3, "1", 2, 1])
+        self.assertEqual(exp.expression, "Column IN (?, ?, ?, ?)")
+        self.assertListEqual(exp.parameters, [3, 1, "1", 2])
+
+        exp1 = Expression("Column1", Operation.EQUAL, 1)
+        exp2 = Expression("Column2", Operation.EQUAL, 2)
+        exp = exp1.AND(exp2).AND(Expression("Column1", Operation.EQUAL, 1))
+        self.assertEqual(exp.expression, "Column1 = ? AND Column2 = ?")
+        self.assertListEqual(exp.columns, ["Column1", "Column2"])
+
+        # mutable binary values are compared as bytes
+        exp = Expression("Column", Operation.IN, [bytearray(b"ab"), b"ab", memoryview(b"cd")])
+        self.assertEqual(exp.expression, "Column IN (?, ?)")
+        self.assertListEqual(exp.parameters, [b"ab", b"cd"])
+
+        exp = Expression("Column", Operation.EQUAL, bytearray(b"ab")).OR(Expression("Column", Operation.EQUAL, b"ab"))
+        self.assertEqual(exp.expression, "Column = ?")
+        self.assertListEqual(exp.parameters, [b"ab"])
+
+        # equal values of different types are kept
+        exp = Expression("Column", Operation.EQUAL, 1).OR(Expression("Column", Operation.EQUAL, 1.0))
+        self.assertEqual(exp.expression, "Column = ? OR Column = ?")
+        self.assertListEqual([type(parameter) for parameter in exp.parameters], [int, float])
+
+    def test_constant_folding(self):
+        exp1 = Expression("Column1", Operation.EQUAL, 1)
+        exp2 = Expression("Column2", Operation.EQUAL, 2)
+        self.assertEqual(exp1.AND(Expression.TRUE()).expression, "Column1 = ?")
+        self.assertEqual(exp1.OR(Expression.FALSE()).expression, "Column1 = ?")
+        self.assertEqual(exp1.AND(Expression.FALSE()).expression, "0")
+        self.assertListEqual(exp1.AND(Expression.FALSE()).parameters, [])
+        self.assertEqual(exp1.OR(Expression.TRUE()).expression, "1")
+
+        empty_in = Expression("Column3", Operation.IN, [])
+        self.assertEqual(exp1.OR(empty_in).AND(exp2).expression, "Column1 = ? AND Column2 = ?")
+        self.assertEqual(Expression.NOT(empty_in).AND(exp2).expression, "Column2 = ?")
+        self.assertEqual(Expression.NOT(Expression.NOT(exp1.OR(exp2))).expression, "Column1 = ? OR Column2 = ?")
+
+    def test_large_in(self):
+        values = list(range(Expression.LARGE_IN_THRESHOLD + 1))
+        exp = Expression("Column", Operation.IN, values + [0])
+        self.assertEqual(exp.expression, "Column IN (SELECT value FROM json_each(?))")
+        self.assertEqual(len(exp.parameters), 1)
+        self.assertListEqual(json.loads(exp.parameters[0]), values)
+        self.assertTrue(exp.inline_expression().startswith("Column IN (0, 1, 2, "))
+
+        # binary values can't be bound as JSON
+        exp = Expression("Column", Operation.IN, [bytes([value % 256, value // 256]) for value in values])
+        self.assertEqual(len(exp.parameters), len(values))
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -1,8 +1,13 @@
-from oopdb.OOPDB import OOPDB, RowsStyle
-from oopdb.ColumnConfig import ColumnConfig, PrimaryKey, DataTypes
+from oopdb.OOPDB import OOPDB, RowsStyle, OrderingTypes, Profile
+from oopdb.ColumnConfig import ColumnConfig, PrimaryKey, ForeignKey, DataTypes
 from oopdb.Expression import Expression, Operation
+from oopdb.QueryPlan import ScanPolicy
+from oopdb.Aggregate import Aggregate
 import unittest
+import unittest.mock
+import importlib.util
 import sqlite3
+import datetime
 import os
 from typing import Any, List
 
@@ -34,8 +39,7 @@ def add_table_to_db(db : OOPDB, table_name : str, columns : List[ColumnConfig],
     for column in columns:
         column_names.append(column.name)
     db.create_table(table_name, columns).execute()
-    for row in range(len(rows_content)):
-        db.insert_into(table_name, column_names, rows_content[row]).execute()
+    db.insert_many(table_name, column_names, rows_content)
 
 class TestOOPDB(unittest.TestCase):
     def test_creation(self):
@@ -159,6 +163,62 @@ class TestOOPDB(unittest.TestCase):
         self.assertEqual(type(results[1][0]), bool)
         self.assertFalse(results[1][0])
 
+    def test_bool_storage(self):
+        temp_db = TempDB()
+        db = temp_db.db
+
+        table_name = "Bools"
+        bool_column = ColumnConfig("Bools", DataTypes.BOOL, False)
+        add_table_to_db(db, table_name, [bool_column], [[True], [False], [True]])
+        storage = db.select(table_name, [f"typeof({bool_column.name})", f"SUM({bool_column.name})"]).fetch()
+        self.assertTupleEqual(storage[0], ("integer", 2))
+
+        # values stored as text by older versions
+        connection = sqlite3.connect(temp_db.holder.filename)
+        connection.execute(f"INSERT INTO {table_name} VALUES ('True'), ('False');")
+        connection.commit()
+        connection.close()
+        self.assertListEqual(db.select(table_name).fetch(), [(True,), (False,), (True,), (True,), (False,)])
+        self.assertEqual(db.migrate_bool_columns(), 2)
+        self.assertEqual(db.migrate_bool_columns(), 0)
+        is_enabled = Expression(bool_column.name, Operation.EQUAL, True)
+        self.assertEqual(db.select_count(table_name).where(is_enabled).fetch()[0][0], 3)
+
+    def test_real_blob_timestamp_types(self):
+        temp_db = TempDB()
+        db = temp_db.db
+
+        table_name = "TestTable"
+        real_column = ColumnConfig("Real", DataTypes.REAL)
+        blob_column = ColumnConfig("Blob", DataTypes.BLOB)
+        timestamp_column = ColumnConfig("Timestamp", DataTypes.TIMESTAMP)
+        utc = datetime.timezone.utc
+        moments = [datetime.datetime(2021, 5, 1, 12, 30, tzinfo=utc), datetime.datetime(2021, 5, 2, 8, 0, 0, 500000)]
+        rows = [[1.5, b"\x00\x01", moments[0]], [-2.25, b"\xff", moments[1]], [None, None, None]]
+        add_table_to_db(db, table_name, [real_column, blob_column, timestamp_column], rows)
+
+        storage = db.select(table_name, [f"typeof({column})" for column in ["Real", "Blob", "Timestamp"]]).limit(1).fetch()
+        self.assertTupleEqual(storage[0], ("real", "blob", "integer"))
+        actual_rows = db.select(table_name).fetch()
+        self.assertListEqual(actual_rows, [(1.5, b"\x00\x01", moments[0]), (-2.25, b"\xff", moments[1].replace(tzinfo=utc)), (None, None, None)])
+
+        later = Expression(timestamp_column.name, Operation.GREATER_THAN, datetime.datetime(2021, 5, 2, tzinfo=utc))
+        self.assertEqual(db.select_count(table_name).where(later).fetch()[0][0], 1)
+
+        # microseconds are restored exactly
+        moments = [datetime.datetime(2021, 1, 1, 0, 0, 0, 123457, tzinfo=utc) + datetime.timedelta(days=day, microseconds=day * 7919)
+                   for day in range(-20000, 40000, 997)]
+        db.delete(table_name).execute()
+        db.insert_many(table_name, [timestamp_column.name], [[moment] for moment in moments])
+        self.assertListEqual([row[0] for row in db.select(table_name, [timestamp_column.name]).fetch()], moments)
+
+        # TIMESTAMP converter of the sqlite3 module isn't replaced for other connections
+        connection = sqlite3.connect(":memory:", detect_types=sqlite3.PARSE_DECLTYPES)
+        connection.execute("CREATE TABLE Other (Value TIMESTAMP)")
+        connection.execute("INSERT INTO Other VALUES ('2024-01-02 03:04:05')")
+        self.assertEqual(connection.execute("SELECT Value FROM Other").fetchone()[0], datetime.datetime(2024, 1, 2, 3, 4, 5))
+        connection.close()
+
     def test_updating(self):
         temp_db = TempDB()
         db = temp_db.db
@@ -209,6 +269,21 @@ class TestOOPDB(unittest.TestCase):
         regex_rows_cnt = db.select_count(table_name).where(text_like).fetch()[0][0]
         self.assertEqual(regex_rows_cnt, 11)
 
+    def test_where_large_in(self):
+        temp_db = TempDB()
+        db = temp_db.db
+
+        table_name = "TestTable"
+        add_table_to_db(db, table_name, [PrimaryKey("Id"), ColumnConfig("Name", DataTypes.TEXT, False)],
+                        [[row_id, f"name{row_id}"] for row_id in range(1, 1001)])
+        ids = list(range(0, 50000, 7))
+        rows = db.select(table_name, ["Id"]).where(Expression("Id", Operation.IN, ids)).fetch()
+        self.assertListEqual([row[0] for row in rows], [row_id for row_id in ids if 1 <= row_id <= 1000])
+
+        names = [f"name{row_id}" for row_id in range(500, 2000)]
+        count = db.select_count(table_name).where(Expression("Name", Operation.IN, names)).fetch()[0][0]
+        self.assertEqual(count, 501)
+
     def test_update_where(self):
         temp_db = TempDB()
         db = temp_db.db
@@ -301,6 +376,757 @@ class TestOOPDB(unittest.TestCase):
         self.assertEqual(distinct_rows[0][0], "Text_is_0")
         self.assertEqual(distinct_rows[1][0], "Text_is_1")
 
+    def test_group_by(self):
+        temp_db = TempDB()
+        db = temp_db.db
+
+        add_table_to_db(db, "Regions", [PrimaryKey("Id"), ColumnConfig("Name", DataTypes.TEXT, False)], [[1, "north"], [2, "south"], [3, "west"]])
+        add_table_to_db(db, "Sales", [ColumnConfig("RegionId", DataTypes.INTEGER, False), ColumnConfig("Amount", DataTypes.INTEGER, False),
+                                      ColumnConfig("Client", DataTypes.TEXT)],
+                        [[1, 10, "a"], [1, 20, "a"], [1, 30, "b"], [2, 5, "c"], [2, 15, "c"], [3, 100, "d"]])
+
+        columns = ["RegionId", Aggregate.SUM("Amount", "Total"), Aggregate.AVG("Amount"), Aggregate.MIN("Amount"), Aggregate.MAX("Amount"),
+                   Aggregate.COUNT(), Aggregate.COUNT("Client", distinct=True, alias="Clients")]
+        rows = db.select("Sales", columns).group_by(["RegionId"]).order_by(["RegionId"], [OrderingTypes.ASCENDING]).fetch()
+        self.assertListEqual(rows, [(1, 60, 20.0, 10, 30, 3, 2), (2, 20, 10.0, 5, 15, 2, 1), (3, 100, 100.0, 100, 100, 1, 1)])
+
+        rows = db.select("Sales", ["Regions.Name", Aggregate.SUM("Amount", "Total")])\
+                 .inner_join("Regions", "Sales.RegionId", "Id")\
+                 .where(Expression("Amount", Operation.GREATER_THAN, 5))\
+                 .group_by(["Regions.Name"])\
+                 .having(Expression("Total", Operation.GREATER_THAN_OR_EQUAL, 15))\
+                 .order_by(["Total"], [OrderingTypes.DESCENDING])\
+                 .fetch(RowsStyle.DICTIONARY)
+        self.assertListEqual(rows, [{"Name" : "west", "Total" : 100}, {"Name" : "north", "Total" : 60}, {"Name" : "south", "Total" : 15}])
+
+        rows = db.select("Sales", ["RegionId"]).group_by(["RegionId"]).having(Expression(Aggregate.COUNT(), Operation.EQUAL, 2)).fetch()
+        self.assertListEqual(rows, [(2,)])
+
+        with self.assertRaises(Exception):
+            db.select("Sales").having(Expression("Amount", Operation.EQUAL, 1))
+        with self.assertRaises(Exception):
+            Aggregate.COUNT(distinct=True)
+
+    def test_quoted_values(self):
+        temp_db = TempDB()
+        db = temp_db.db
+
+        table_name = "TestTable"
+        text_column = ColumnConfig("Text", DataTypes.TEXT, False)
+        text = "It's a 'quoted'; text"
+        add_table_to_db(db, table_name, [text_column], [[text]])
+
+        rows = db.select(table_name).where(Expression(text_column.name, Operation.EQUAL, text)).fetch()
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0][0], text)
+
+        db.update(table_name, [text_column.name], ["O'Neil"]).where(Expression(text_column.name, Operation.EQUAL, text)).execute()
+        rows = db.select(table_name).fetch()
+        self.assertEqual(rows[0][0], "O'Neil")
+
+    def test_queued_statements(self):
+        temp_db = TempDB()
+        db = temp_db.db
+
+        table_name = "TestTable"
+        int_column = ColumnConfig("Id", DataTypes.INTEGER, False)
+        db.create_table(table_name, [int_column])
+        for row_id in range(10):
+            db.insert_into(table_name, [int_column.name], [row_id])
+        self.assertTrue(db.execute())
+        self.assertEqual(db.select_count(table_name).fetch()[0][0], 10)
+
+        # failed statement rolls back the whole queue
+        db.insert_into(table_name, [int_column.name], [10]).insert_into("MissingTable", [int_column.name], [11])
+        self.assertFalse(db.execute())
+        self.assertEqual(db.select_count(table_name).fetch()[0][0], 10)
+
+    def test_insert_many(self):
+        temp_db = TempDB()
+        db = temp_db.db
+
+        table_name = "TestTable"
+        id_column = PrimaryKey("Id")
+        text_column = ColumnConfig("Text", DataTypes.TEXT, False)
+        add_table_to_db(db, table_name, [id_column, text_column])
+
+        row_cnt = 1000
+        rows = ([f"Row{row_id}"] for row_id in range(row_cnt))
+        row_ids = db.insert_many(table_name, [text_column.name], rows, chunk_size=64)
+        self.assertEqual(len(row_ids), row_cnt)
+        actual_rows = db.select(table_name).order_by([id_column.name], [OrderingTypes.ASCENDING]).fetch()
+        self.assertListEqual(row_ids, [row[0] for row in actual_rows])
+        self.assertListEqual([f"Row{row_id}" for row_id in range(row_cnt)], [row[1] for row in actual_rows])
+
+        explicit_row_ids = db.insert_many(table_name, [id_column.name, text_column.name], [[5000, "Row5000"], [4000, "Row4000"]])
+        self.assertListEqual(explicit_row_ids, [5000, 4000])
+
+        # failed chunk is rolled back and only previous chunks are kept
+        row_ids = db.insert_many(table_name, [id_column.name, text_column.name], [[6000, "Row6000"], [6001, None]], chunk_size=1)
+        self.assertListEqual(row_ids, [6000])
+        self.assertEqual(db.select_count(table_name).fetch()[0][0], row_cnt + 3)
+
+        # explicit and assigned ids in one chunk
+        for version, explicit_id in [(sqlite3.sqlite_version_info, 7000), ((3, 34, 0), 8000)]:
+            with unittest.mock.patch.object(sqlite3, "sqlite_version_info", version):
+                row_ids = db.insert_many(table_name, [id_column.name, text_column.name], [[None, "a"], [explicit_id, "b"], [None, "c"]])
+                self.assertEqual(row_ids[1], explicit_id)
+                stored_ids = db.select(table_name, [id_column.name]).where(Expression(text_column.name, Operation.IN, ["a", "b", "c"])) \
+                               .order_by([text_column.name], [OrderingTypes.ASCENDING]).fetch()
+                self.assertListEqual(row_ids, [row[0] for row in stored_ids])
+                db.delete(table_name).where(Expression(text_column.name, Operation.IN, ["a", "b", "c"])).execute()
+
+        db.cursor.execute("CREATE TABLE Pairs (Key TEXT PRIMARY KEY, Value INTEGER) WITHOUT ROWID")
+        self.assertListEqual(db.insert_many("Pairs", ["Key", "Value"], [["a", 1], ["b", 2]]), [None, None])
+        self.assertEqual(db.select_count("Pairs").fetch()[0][0], 2)
+
+    def test_transaction(self):
+        temp_db = TempDB()
+        db = temp_db.db
+
+        table_name = "TestTable"
+        int_column = ColumnConfig("Id", DataTypes.INTEGER, False)
+        add_table_to_db(db, table_name, [int_column])
+
+        with db.transaction(mode="IMMEDIATE"):
+            for row_id in range(10):
+                db.insert_into(table_name, [int_column.name], [row_id]).execute()
+            # changes are not committed yet, so other connections can't see them
+            other_connection = sqlite3.connect(temp_db.holder.filename, timeout=0)
+            with self.assertRaises(sqlite3.OperationalError):
+                other_connection.execute(f"INSERT INTO {table_name} VALUES (100);")
+            other_connection.close()
+        self.assertEqual(db.select_count(table_name).fetch()[0][0], 10)
+
+        with self.assertRaises(ValueError):
+            with db.transaction():
+                db.delete(table_name).execute()
+                raise ValueError
+        self.assertEqual(db.select_count(table_name).fetch()[0][0], 10)
+
+    def test_failed_commit(self):
+        holder = TempFileHolder("temp_commit.db")
+        db = OOPDB().open(holder.filename, busy_timeout=0)
+        table_name = "TestTable"
+        add_table_to_db(db, table_name, [ColumnConfig("Id", DataTypes.INTEGER, False)])
+
+        # reader holds the lock, so the commit fails and the changes are rolled back
+        reader = sqlite3.connect(holder.filename, timeout=0)
+        reader.execute("BEGIN")
+        reader.execute(f"SELECT * FROM {table_name}").fetchall()
+        self.assertFalse(db.insert_into(table_name, ["Id"], [1]).execute())
+        self.assertFalse(db.connection.in_transaction)
+        reader.rollback()
+        reader.close()
+
+        self.assertTrue(db.insert_into(table_name, ["Id"], [2]).execute())
+        self.assertListEqual(db.select(table_name).fetch(), [(2,)])
+
+        # transaction opened directly by the connection isn't committed implicitly
+        db.connection.execute(f"INSERT INTO {table_name} VALUES (3)")
+        with self.assertRaises(Exception):
+            with db.transaction():
+                pass
+        db.connection.rollback()
+        self.assertListEqual(db.select(table_name).fetch(), [(2,)])
+        db.close()
+
+    def test_nested_transaction(self):
+        temp_db = TempDB()
+        db = temp_db.db
+
+        table_name = "TestTable"
+        int_column = ColumnConfig("Id", DataTypes.INTEGER, False)
+        add_table_to_db(db, table_name, [int_column])
+
+        with db.transaction():
+            db.insert_into(table_name, [int_column.name], [1]).execute()
+            with self.assertRaises(ValueError):
+                with db.transaction():
+                    db.insert_into(table_name, [int_column.name], [2]).execute()
+                    raise ValueError
+            with db.transaction():
+                db.insert_many(table_name, [int_column.name], [[3], [4]])
+            self.assertEqual(db.transaction_depth, 1)
+        self.assertEqual(db.transaction_depth, 0)
+
+        rows = db.select(table_name).fetch()
+        self.assertListEqual([row[0] for row in rows], [1, 3, 4])
+
+    def test_iter_rows(self):
+        temp_db = TempDB()
+        db = temp_db.db
+
+        table_name = "TestTable"
+        int_column = ColumnConfig("Id", DataTypes.INTEGER, False)
+        text_column = ColumnConfig("Text", DataTypes.TEXT, False)
+        row_cnt = 250
+        rows = [[row_id, f"Row{row_id}"] for row_id in range(row_cnt)]
+        add_table_to_db(db, table_name, [int_column, text_column], rows)
+
+        rows_iterator = db.select(table_name).where(Expression(int_column.name, Operation.LESS_THAN, 200)).iter_rows(batch_size=16)
+        # queue is free, so other commands can be executed while iterating
+        self.assertEqual(db.select_count(table_name).fetch()[0][0], row_cnt)
+        actual_rows = list(rows_iterator)
+        self.assertListEqual(actual_rows, [tuple(row) for row in rows[:200]])
+
+        dict_rows = db.select(table_name).iter_rows(rows_style=RowsStyle.DICTIONARY)
+        first_row = next(dict_rows)
+        self.assertDictEqual(first_row, {int_column.name: 0, text_column.name: "Row0"})
+        self.assertEqual(len(list(dict_rows)), row_cnt - 1)
+
+        # modifying commands are committed like execute does
+        cache = db.enable_result_cache()
+        self.assertEqual(db.select_count(table_name).fetch()[0][0], row_cnt)
+        rows_iterator = db.insert_into(table_name, [int_column.name, text_column.name], [-1, "New"]).select_count(table_name).iter_rows()
+        self.assertListEqual(list(rows_iterator), [(row_cnt + 1,)])
+        self.assertFalse(db.connection.in_transaction)
+        self.assertEqual(db.select_count(table_name).fetch()[0][0], row_cnt + 1)
+        self.assertEqual(cache.hits, 0)
+        with db.transaction():
+            db.delete(table_name).where(Expression(int_column.name, Operation.EQUAL, -1)).execute()
+        db.disable_result_cache()
+
+    def test_create_index(self):
+        temp_db = TempDB()
+        db = temp_db.db
+
+        table_name = "TestTable"
+        int_column = ColumnConfig("Id", DataTypes.INTEGER, False)
+        text_column = ColumnConfig("Text", DataTypes.TEXT, False)
+        add_table_to_db(db, table_name, [int_column, text_column], [[1, "a"], [2, "b"]])
+
+        db.create_index("Composite", table_name, [int_column.name, text_column.name]).execute()
+        partial_condition = Expression(text_column.name, Operation.NOT_EQUAL, "It's")
+        db.create_index("Partial", table_name, [int_column.name], is_unique=True, where=partial_condition).execute()
+        indexes = db.select("sqlite_master", ["name", "sql"]).where(Expression("type", Operation.EQUAL, "index")).fetch(RowsStyle.DICTIONARY)
+        self.assertListEqual([index["name"] for index in indexes], ["Composite", "Partial"])
+        self.assertEqual(indexes[1]["sql"], f"CREATE UNIQUE INDEX Partial ON {table_name} (Id) WHERE Text <> 'It''s'")
+
+        # unique index rejects duplicates that match the partial condition only
+        self.assertFalse(db.insert_into(table_name, [int_column.name, text_column.name], [1, "c"]).execute())
+        self.assertTrue(db.insert_into(table_name, [int_column.name, text_column.name], [1, "It's"]).execute())
+
+        db.drop_index("Composite").drop_index("Missing").execute()
+        index_cnt = db.select_count("sqlite_master").where(Expression("type", Operation.EQUAL, "index")).fetch()[0][0]
+        self.assertEqual(index_cnt, 1)
+
+    def test_column_indexes(self):
+        temp_db = TempDB()
+        db = temp_db.db
+
+        add_table_to_db(db, "Tags", [PrimaryKey("Id"), ColumnConfig("Name", DataTypes.TEXT, False, is_unique=True)])
+        add_table_to_db(db, "Relations", [ForeignKey("TagId", "Tags", "Id"), ColumnConfig("Weight", DataTypes.INTEGER, is_indexed=True)])
+        indexes = db.select("sqlite_master", ["name", "tbl_name"]).where(Expression("name", Operation.LIKE, "%_index")).fetch()
+        self.assertListEqual(indexes, [("Tags_Name_index", "Tags"), ("Relations_TagId_index", "Relations"), ("Relations_Weight_index", "Relations")])
+
+        db.insert_into("Tags", ["Name"], ["Tag"]).execute()
+        self.assertFalse(db.insert_into("Tags", ["Name"], ["Tag"]).execute())
+
+    def test_import_file(self):
+        temp_db = TempDB()
+        db = temp_db.db
+
+        table_name = "Events"
+        add_table_to_db(db, table_name, [PrimaryKey("Id"), ColumnConfig("Name", DataTypes.TEXT, False, is_indexed=True),
+                                         ColumnConfig("Count", DataTypes.INTEGER), ColumnConfig("Enabled", DataTypes.BOOL),
+                                         ColumnConfig("Created", DataTypes.TIMESTAMP)])
+        csv_holder = TempFileHolder("temp_import.csv")
+        with open(csv_holder.filename, "w", encoding="utf-8") as file:
+            file.write("Name,Count,Enabled,Created,Extra\n")
+            for row_id in range(25):
+                file.write(f"event{row_id},{row_id if row_id % 5 else ''},{'true' if row_id % 2 else 'no'},2021-05-0{row_id % 9 + 1}T00:00:00+00:00,x\n")
+        progress = []
+        imported_cnt = db.import_file(table_name, csv_holder.filename, chunk_size=10, defer_indexes=True, progress=progress.append)
+        self.assertEqual(imported_cnt, 25)
+        self.assertListEqual([report.rows_count for report in progress], [10, 20, 25])
+        self.assertTrue(all(report.rows_per_second > 0 for report in progress))
+        row = db.select(table_name, ["Name", "Count", "Enabled", "Created"]).where(Expression("Id", Operation.EQUAL, 4)).fetch()[0]
+        utc = datetime.timezone.utc
+        self.assertEqual(row, ("event3", 3, True, datetime.datetime(2021, 5, 4, tzinfo=utc)))
+        self.assertIsNone(db.select(table_name, ["Count"]).where(Expression("Id", Operation.EQUAL, 1)).fetch()[0][0])
+        # deferred index is created again
+        self.assertTrue(db.schema.column(table_name, "Name").is_indexed)
+
+        jsonl_holder = TempFileHolder("temp_import.jsonl")
+        with open(jsonl_holder.filename, "w", encoding="utf-8") as file:
+            file.write('{"title": "first", "amount": "7", "on": 1, "time": 1620000000}\n\n')
+            file.write('{"title": "second", "on": false}\n')
+            file.write('{"title": "third", "amount": "bad"}\n')
+        column_map = {"title" : "Name", "amount" : "Count", "on" : "Enabled", "time" : "Created"}
+        imported_cnt = db.import_file(table_name, jsonl_holder.filename, column_map=column_map, chunk_size=2)
+        self.assertEqual(imported_cnt, 2)
+        rows = db.select(table_name, ["Name", "Count", "Enabled", "Created"]).where(Expression("Id", Operation.GREATER_THAN, 25)).fetch()
+        self.assertListEqual(rows, [("first", 7, True, datetime.datetime.fromtimestamp(1620000000, utc)), ("second", None, False, None)])
+
+        with self.assertRaises(Exception):
+            db.import_file(table_name, jsonl_holder.filename, column_map={"title" : "Missing"})
+        with self.assertRaises(Exception):
+            db.import_file("Missing", csv_holder.filename)
+
+    def test_import_file_constraints(self):
+        temp_db = TempDB()
+        db = temp_db.db
+
+        table_name = "Codes"
+        add_table_to_db(db, table_name, [ColumnConfig("Code", DataTypes.TEXT, False, is_unique=True), ColumnConfig("Name", DataTypes.TEXT, is_indexed=True),
+                                         ColumnConfig("Amount", DataTypes.INTEGER)])
+        csv_holder = TempFileHolder("temp_import.csv")
+        with open(csv_holder.filename, "w", encoding="utf-8") as file:
+            file.write("Code,Name\na,first\na,second\nb,third\n")
+        # unique index isn't deferred, so duplicate stops the import
+        self.assertEqual(db.import_file(table_name, csv_holder.filename, chunk_size=1, defer_indexes=True), 1)
+        indexes = db.select("sqlite_master", ["name"]).where(Expression("type", Operation.EQUAL, "index")).fetch()
+        self.assertListEqual(sorted(row[0] for row in indexes), ["Codes_Code_index", "Codes_Name_index"])
+
+        # fields missing in sparse JSON objects aren't inserted, so column defaults are used
+        jsonl_holder = TempFileHolder("temp_import.jsonl")
+        with open(jsonl_holder.filename, "w", encoding="utf-8") as file:
+            file.write('{"Code": "x"}\n{"Code": "y", "Amount": 5}\n')
+        self.assertEqual(db.import_file(table_name, jsonl_holder.filename), 2)
+        rows = db.select(table_name, ["Code", "Amount"]).where(Expression("Code", Operation.IN, ["x", "y"])).fetch()
+        self.assertListEqual(rows, [("x", None), ("y", 5)])
+
+        db.connection.execute("CREATE TABLE Tasks (Name TEXT, Status TEXT NOT NULL DEFAULT 'new')")
+        with open(jsonl_holder.filename, "w", encoding="utf-8") as file:
+            file.write('{"Name": "a"}\n{"Name": "b", "Status": "done"}\n{"Name": "c"}\n{}\n')
+        self.assertEqual(db.import_file("Tasks", jsonl_holder.filename), 4)
+        self.assertListEqual(db.select("Tasks").fetch(), [("a", "new"), ("b", "done"), ("c", "new"), (None, "new")])
+
+        # index that can't be created again for the imported rows is reported, other indexes are created
+        db.delete(table_name).execute()
+        db.connection.execute(f"CREATE INDEX Codes_Json_index ON {table_name} (json_extract(Name, '$.a'))")
+        with open(csv_holder.filename, "w", encoding="utf-8") as file:
+            file.write("Code,Name\nc,not json\n")
+        with self.assertRaises(Exception):
+            db.import_file(table_name, csv_holder.filename, defer_indexes=True)
+        indexes = db.select("sqlite_master", ["name"]).where(Expression("type", Operation.EQUAL, "index")).fetch()
+        self.assertListEqual(sorted(row[0] for row in indexes), ["Codes_Code_index", "Codes_Name_index"])
+
+    def test_upsert(self):
+        temp_db = TempDB()
+        db = temp_db.db
+
+        table_name = "Prices"
+        add_table_to_db(db, table_name, [PrimaryKey("Id"), ColumnConfig("Code", DataTypes.TEXT, False, is_unique=True),
+                                         ColumnConfig("Price", DataTypes.INTEGER), ColumnConfig("Note", DataTypes.TEXT)])
+        row_ids = db.upsert(table_name, ["Code", "Price", "Note"], [["a", 1, "first"], ["b", 2, "first"]], ["Code"])
+        self.assertListEqual(row_ids, [1, 2])
+
+        row_ids = db.upsert(table_name, ["Code", "Price", "Note"], iter([["b", 20, "second"], ["c", 3, "second"]]), ["Code"], ["Price"], chunk_size=1)
+        rows = db.select(table_name, ["Id", "Code", "Price", "Note"]).order_by(["Id"], [OrderingTypes.ASCENDING]).fetch()
+        self.assertListEqual([row[1:] for row in rows], [("a", 1, "first"), ("b", 20, "first"), ("c", 3, "second")])
+        self.assertListEqual(row_ids, [rows[1][0], rows[2][0]])
+
+        # existing rows are kept with empty update columns and aren't returned
+        row_ids = db.upsert(table_name, ["Code", "Price"], [["a", 100], ["d", 4]], ["Code"], [])
+        self.assertListEqual(row_ids, [db.select(table_name, ["Id"]).where(Expression("Code", Operation.EQUAL, "d")).fetch()[0][0]])
+        self.assertEqual(db.select(table_name, ["Price"]).where(Expression("Code", Operation.EQUAL, "a")).fetch()[0][0], 1)
+
+        self.assertListEqual(db.upsert(table_name, ["Code"], [["e"]], ["Price"]), [])
+
+    def test_update_many(self):
+        temp_db = TempDB()
+        db = temp_db.db
+
+        table_name = "Prices"
+        add_table_to_db(db, table_name, [PrimaryKey("Id"), ColumnConfig("Price", DataTypes.INTEGER), ColumnConfig("Enabled", DataTypes.BOOL)],
+                        [[row_id, row_id, False] for row_id in range(1, 11)])
+        updated_cnt = db.update_many(table_name, "Id", ["Price", "Enabled", "Id"], ((row_id * 10, True, row_id) for row_id in range(5, 15)), chunk_size=3)
+        self.assertEqual(updated_cnt, 6)
+        rows = db.select(table_name, ["Price", "Enabled"]).order_by(["Id"], [OrderingTypes.ASCENDING]).fetch()
+        self.assertListEqual(rows, [(row_id, False) for row_id in range(1, 5)] + [(row_id * 10, True) for row_id in range(5, 11)])
+
+        with self.assertRaises(Exception):
+            db.update_many(table_name, "Missing", ["Price"], [[1]])
+
+    def test_explain(self):
+        temp_db = TempDB()
+        db = temp_db.db
+
+        add_table_to_db(db, "Users", [PrimaryKey("Id"), ColumnConfig("Name", DataTypes.TEXT, False)], [[row_id, f"user{row_id}"] for row_id in range(50)])
+        add_table_to_db(db, "Orders", [ColumnConfig("UserId", DataTypes.INTEGER, False), ColumnConfig("Price", DataTypes.INTEGER, False)],
+                        [[row_id % 50, row_id] for row_id in range(200)])
+
+        by_name = Expression("Name", Operation.EQUAL, "user1")
+        plan = db.select("Users").where(by_name).explain(max_scan_rows=10)
+        self.assertListEqual(plan.scanned_tables(), ["Users"])
+        self.assertEqual(len(plan.full_scans), 1)
+        self.assertEqual(plan.full_scans[0].rows_count, 11)
+        self.assertListEqual(plan.full_scans[0].columns, ["Name"])
+        self.assertEqual(plan.full_scans[0].suggested_index, "CREATE INDEX Users_Name_index ON Users (Name)")
+        self.assertTrue(str(plan).startswith("QUERY PLAN\n`--SCAN Users"))
+        # explained command isn't executed and the queue is free
+        self.assertEqual(len(db.statements), 0)
+
+        self.assertEqual(len(db.select("Users").where(by_name).explain(max_scan_rows=100).full_scans), 0)
+        with self.assertWarns(UserWarning):
+            db.select("Users").where(by_name).explain(ScanPolicy.WARN, max_scan_rows=10)
+        with self.assertRaises(Exception):
+            db.select("Users").where(by_name).explain(ScanPolicy.RAISE, max_scan_rows=10)
+
+        cheap = Expression("Price", Operation.LESS_THAN, 10)
+        plan = db.select("Users", ["Name", "Price"]).inner_join("Orders", "Id", "UserId").where(cheap).explain(max_scan_rows=10)
+        scans = {scan.table : scan.columns for scan in plan.full_scans}
+        self.assertListEqual(scans["Orders"], ["UserId", "Price"])
+
+        db.create_index("Users_Name_index", "Users", ["Name"]).execute()
+        plan = db.select("Users").where(by_name).explain(ScanPolicy.RAISE, max_scan_rows=10)
+        self.assertTrue(plan.nodes[0].detail.startswith("SEARCH Users"))
+
+        with self.assertRaises(Exception):
+            db.select("Users").select("Orders").explain()
+
+    def test_limit_offset(self):
+        temp_db = TempDB()
+        db = temp_db.db
+
+        table_name = "TestTable"
+        int_column = ColumnConfig("Id", DataTypes.INTEGER, False)
+        add_table_to_db(db, table_name, [int_column], [[row_id] for row_id in range(100)])
+
+        rows = db.select(table_name).order_by([int_column.name], [OrderingTypes.DESCENDING]).limit(3).fetch()
+        self.assertListEqual([row[0] for row in rows], [99, 98, 97])
+        rows = db.select(table_name).order_by([int_column.name], [OrderingTypes.ASCENDING]).limit(3).offset(10).fetch()
+        self.assertListEqual([row[0] for row in rows], [10, 11, 12])
+        rows = db.select(table_name).order_by([int_column.name], [OrderingTypes.ASCENDING]).offset(97).fetch()
+        self.assertListEqual([row[0] for row in rows], [97, 98, 99])
+
+    def test_page_after(self):
+        temp_db = TempDB()
+        db = temp_db.db
+
+        table_name = "TestTable"
+        group_column = ColumnConfig("GroupId", DataTypes.INTEGER, False)
+        int_column = ColumnConfig("Id", DataTypes.INTEGER, False)
+        add_table_to_db(db, table_name, [group_column, int_column], [[row_id % 3, row_id] for row_id in range(100)])
+
+        page = db.select(table_name).order_by([int_column.name], [OrderingTypes.ASCENDING]).page_after(None, 5).fetch()
+        self.assertListEqual([row[1] for row in page], [0, 1, 2, 3, 4])
+        page = db.select(table_name).order_by([int_column.name], [OrderingTypes.ASCENDING]).page_after(page[-1][1], 5).fetch()
+        self.assertListEqual([row[1] for row in page], [5, 6, 7, 8, 9])
+
+        # composite key combined with the existing condition
+        in_groups = Expression(group_column.name, Operation.EQUAL, 0).OR(Expression(group_column.name, Operation.EQUAL, 1))
+        columns = [group_column.name, int_column.name]
+        orders = [OrderingTypes.DESCENDING, OrderingTypes.DESCENDING]
+        visited = []
+        last_key = None
+        while True:
+            page = db.select(table_name).where(in_groups).order_by(columns, orders).page_after(last_key, 7).fetch()
+            if len(page) == 0:
+                break
+            visited += page
+            last_key = page[-1]
+        expected = db.select(table_name).where(in_groups).order_by(columns, orders).fetch()
+        self.assertEqual(len(expected), 67)
+        self.assertListEqual(visited, expected)
+
+        with self.assertRaises(Exception):
+            db.select(table_name).page_after(None, 5)
+        with self.assertRaises(Exception):
+            db.select(table_name).order_by(columns, [OrderingTypes.ASCENDING, OrderingTypes.DESCENDING]).page_after(None, 5)
+
+    def test_prepared_query(self):
+        temp_db = TempDB()
+        db = temp_db.db
+
+        table_name = "TestTable"
+        int_column = ColumnConfig("Id", DataTypes.INTEGER, False)
+        text_column = ColumnConfig("Text", DataTypes.TEXT, False)
+        add_table_to_db(db, table_name, [int_column, text_column])
+
+        insert_query = db.insert_into(table_name, [int_column.name, text_column.name], [0, "Row0"]).prepare()
+        self.assertEqual(insert_query.sql, f"INSERT INTO {table_name} (Id, Text) VALUES (?, ?)")
+        self.assertTrue(insert_query.execute())
+        for row_id in range(1, 10):
+            self.assertTrue(insert_query.execute([row_id, f"Row{row_id}"]))
+
+        select_query = db.select(table_name, [text_column.name]).where(Expression(int_column.name, Operation.EQUAL, 0)).prepare()
+        # queue is free, so two builders can coexist
+        self.assertEqual(db.select_count(table_name).fetch()[0][0], 10)
+        self.assertListEqual(select_query.fetch(), [("Row0",)])
+        self.assertListEqual(select_query.fetch(RowsStyle.DICTIONARY, [5]), [{text_column.name: "Row5"}])
+        self.assertListEqual(list(select_query.bind([7]).iter_rows()), [("Row7",)])
+        self.assertTupleEqual(select_query.parameters, (0,))
+
+        with self.assertRaises(Exception):
+            select_query.bind([1, 2])
+
+    def test_parallel_scan(self):
+        temp_db = TempDB()
+        db = temp_db.db
+
+        table_name = "TestTable"
+        group_column = ColumnConfig("GroupId", DataTypes.INTEGER)
+        int_column = ColumnConfig("Id", DataTypes.INTEGER, False)
+        text_column = ColumnConfig("Text", DataTypes.TEXT, False)
+        rows = [[row_id % 7 if row_id % 10 else None, row_id, f"Row{row_id}"] for row_id in range(1000)]
+        add_table_to_db(db, table_name, [group_column, int_column, text_column], rows)
+
+        self.assertListEqual(db.parallel_scan(table_name, workers=3), db.select(table_name).fetch())
+
+        condition = Expression(int_column.name, Operation.GREATER_THAN, 100)
+        order_columns = [group_column.name, int_column.name]
+        orders = [OrderingTypes.ASCENDING, OrderingTypes.DESCENDING]
+        actual_rows = db.parallel_scan(table_name, [int_column.name, group_column.name], condition, order_columns, orders, workers=4, rows_style=RowsStyle.DICTIONARY)
+        expected_rows = db.select(table_name, [int_column.name, group_column.name]).where(condition).order_by(order_columns, orders).fetch(RowsStyle.DICTIONARY)
+        self.assertEqual(len(actual_rows), 899)
+        self.assertListEqual(actual_rows, expected_rows)
+
+        with self.assertRaises(Exception):
+            db.parallel_scan(table_name, [text_column.name], order_columns=[int_column.name], orders=[OrderingTypes.ASCENDING])
+        with self.assertRaises(sqlite3.OperationalError):
+            db.parallel_scan(table_name, ["MissingColumn"])
+        with self.assertRaisesRegex(Exception, "at least one worker"):
+            db.parallel_scan(table_name, workers=0)
+
+        db.delete(table_name).execute()
+        self.assertListEqual(db.parallel_scan(table_name), [])
+
+    def test_result_cache(self):
+        temp_db = TempDB()
+        db = temp_db.db
+
+        table_name = "TestTable"
+        other_table_name = "OtherTable"
+        int_column = ColumnConfig("Id", DataTypes.INTEGER, False)
+        add_table_to_db(db, table_name, [int_column], [[row_id] for row_id in range(10)])
+        add_table_to_db(db, other_table_name, [int_column], [[0]])
+        cache = db.enable_result_cache()
+
+        select_query = db.select(table_name).where(Expression(int_column.name, Operation.LESS_THAN, 3)).prepare()
+        self.assertListEqual(select_query.fetch(), [(0,), (1,), (2,)])
+        self.assertListEqual(select_query.fetch(), [(0,), (1,), (2,)])
+        self.assertListEqual(select_query.fetch(parameters=[2]), [(0,), (1,)])
+        self.assertEqual(db.select_count(other_table_name).fetch()[0][0], 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+
+        # modification of other table keeps the result
+        db.insert_into(other_table_name, [int_column.name], [1]).execute()
+        select_query.fetch()
+        self.assertEqual(cache.hits, 2)
+        self.assertEqual(db.select_count(other_table_name).fetch()[0][0], 2)
+
+        for modify in [lambda: db.insert_into(table_name, [int_column.name], [-1]).execute(),
+                       lambda: db.update(table_name, [int_column.name], [-2]).where(Expression(int_column.name, Operation.EQUAL, -1)).execute(),
+                       lambda: db.insert_many(table_name, [int_column.name], [[-3]]),
+                       lambda: db.delete(table_name).where(Expression(int_column.name, Operation.LESS_THAN, 0)).execute()]:
+            before = select_query.fetch()
+            hits = cache.hits
+            modify()
+            after = select_query.fetch()
+            self.assertEqual(cache.hits, hits)
+            self.assertNotEqual(before, after)
+
+        # rolled back changes are dropped from the cache
+        with self.assertRaises(ValueError):
+            with db.transaction():
+                db.delete(table_name).execute()
+                self.assertListEqual(select_query.fetch(), [])
+                raise ValueError
+        self.assertListEqual(select_query.fetch(), [(0,), (1,), (2,)])
+
+        # binary parameters of mutable types are cached as bytes
+        blob_column = ColumnConfig("Data", DataTypes.BLOB)
+        blob_table_name = "BlobTable"
+        add_table_to_db(db, blob_table_name, [blob_column], [[b"ab"], [b"cd"]])
+        cached_cnt = len(cache)
+        for value in [bytearray(b"ab"), memoryview(b"ab"), b"ab"]:
+            self.assertListEqual(db.select(blob_table_name).where(Expression(blob_column.name, Operation.EQUAL, value)).fetch(), [(b"ab",)])
+        self.assertEqual(len(cache), cached_cnt + 1)
+
+        db.disable_result_cache()
+        self.assertIsNone(db.result_cache)
+
+    def test_columns_row_style(self):
+        temp_db = TempDB()
+        db = temp_db.db
+
+        table_name = "TestTable"
+        int_column = ColumnConfig("Id", DataTypes.INTEGER)
+        text_column = ColumnConfig("Text", DataTypes.TEXT)
+        bool_column = ColumnConfig("Enable", DataTypes.BOOL)
+        rows = [[row_id if row_id % 5 else None, f"Row{row_id}", bool(row_id % 2)] for row_id in range(2500)]
+        add_table_to_db(db, table_name, [int_column, text_column, bool_column], rows)
+
+        with unittest.mock.patch("oopdb.OOPDB.numpy", None):
+            columns = db.select(table_name).fetch(RowsStyle.COLUMNS)
+            self.assertListEqual(list(columns.keys()), [int_column.name, text_column.name, bool_column.name])
+            for column_id, values in enumerate(columns.values()):
+                self.assertListEqual(values, [row[column_id] for row in rows])
+
+            batches = list(db.select(table_name, [int_column.name]).iter_rows(batch_size=1000, rows_style=RowsStyle.COLUMNS))
+            self.assertListEqual([len(batch[int_column.name]) for batch in batches], [1000, 1000, 500])
+            empty_columns = db.select(table_name, [int_column.name]).where(Expression(text_column.name, Operation.EQUAL, "")).fetch(RowsStyle.COLUMNS)
+            self.assertDictEqual(empty_columns, {int_column.name: []})
+
+            # modifying commands are committed like execute does
+            cache = db.enable_result_cache()
+            self.assertEqual(db.select_count(table_name).fetch()[0][0], 2500)
+            columns = db.insert_into(table_name, [int_column.name], [-1]).select_count(table_name).fetch(RowsStyle.COLUMNS)
+            self.assertDictEqual(columns, {"COUNT(*)": [2501]})
+            self.assertFalse(db.connection.in_transaction)
+            self.assertEqual(db.select_count(table_name).fetch()[0][0], 2501)
+            self.assertEqual(cache.hits, 0)
+            db.disable_result_cache()
+
+    @unittest.skipIf(importlib.util.find_spec("numpy") is None, "numpy isn't installed")
+    def test_columns_row_style_numpy(self):
+        import numpy
+        temp_db = TempDB()
+        db = temp_db.db
+
+        table_name = "TestTable"
+        int_column = ColumnConfig("Id", DataTypes.INTEGER)
+        text_column = ColumnConfig("Text", DataTypes.TEXT)
+        bool_column = ColumnConfig("Enable", DataTypes.BOOL)
+        rows = [[row_id if row_id % 5 else None, f"Row{row_id}", bool(row_id % 2)] for row_id in range(100)]
+        add_table_to_db(db, table_name, [int_column, text_column, bool_column], rows)
+
+        columns = db.select(table_name).fetch(RowsStyle.COLUMNS)
+        self.assertEqual(columns[int_column.name].dtype, numpy.int64)
+        self.assertEqual(columns[bool_column.name].dtype, numpy.bool_)
+        self.assertEqual(columns[text_column.name].dtype, object)
+        self.assertListEqual(list(columns[int_column.name].mask), [row[0] is None for row in rows])
+        self.assertEqual(columns[int_column.name].sum(), sum(row[0] for row in rows if row[0] is not None))
+        self.assertEqual(columns[bool_column.name].sum(), 50)
+        self.assertListEqual(columns[text_column.name].tolist(), [row[1] for row in rows])
+
+        count = db.select_count(table_name).fetch(RowsStyle.COLUMNS)
+        self.assertEqual(count["COUNT(*)"][0], 100)
+
+    def test_record_row_style(self):
+        temp_db = TempDB()
+        db = temp_db.db
+
+        table_name = "TestTable"
+        int_column = ColumnConfig("Id", DataTypes.INTEGER, False)
+        text_column = ColumnConfig("Text", DataTypes.TEXT, False)
+        rows = [[row_id, f"Row{row_id}"] for row_id in range(10)]
+        add_table_to_db(db, table_name, [int_column, text_column], rows)
+
+        records = db.select(table_name).fetch(RowsStyle.RECORD)
+        self.assertEqual(len(records), 10)
+        for record, row in zip(records, rows):
+            self.assertEqual(record.Id, row[0])
+            self.assertEqual(record["Text"], row[1])
+            self.assertEqual(record[0], row[0])
+            self.assertTupleEqual(tuple(record), tuple(row))
+            self.assertDictEqual(record._asdict(), {"Id": row[0], "Text": row[1]})
+            self.assertFalse(hasattr(record, "__dict__"))
+        # one class for each query shape
+        self.assertIs(type(records[0]), type(db.select(table_name).iter_rows(rows_style=RowsStyle.RECORD).__next__()))
+
+        count = db.select(table_name, [int_column.name, "COUNT(*)", int_column.name]).fetch(RowsStyle.RECORD)[0]
+        self.assertEqual(count["COUNT(*)"], 10)
+        self.assertEqual(count._1, 10)
+        self.assertTupleEqual(count._keys(), ("Id", "COUNT(*)", "Id"))
+        self.assertDictEqual(count._asdict(), {"Id": count.Id, "COUNT(*)": 10})
+
+        # columns with names of record methods are available as attributes
+        records = db.select(table_name, [f"{int_column.name} AS keys", f"{text_column.name} AS to_dict"]).fetch(RowsStyle.RECORD)
+        self.assertEqual(records[0].keys, 0)
+        self.assertEqual(records[0].to_dict, "Row0")
+        self.assertTupleEqual(records[0]._keys(), ("keys", "to_dict"))
+
+    def test_profiles(self):
+        holders = [TempFileHolder(filename) for filename in ["temp_profile.db", "temp_profile.db-wal", "temp_profile.db-shm"]]
+        db = OOPDB().open(holders[0].filename, profile="oltp", synchronous="FULL", cache_size=-1024)
+        settings = db.settings()
+        self.assertEqual(settings["journal_mode"], "wal")
+        self.assertEqual(settings["synchronous"], 2)
+        self.assertEqual(settings["cache_size"], -1024)
+        self.assertEqual(settings["busy_timeout"], 5000)
+        self.assertEqual(settings["temp_store"], 2)
+        db.close()
+
+        db = OOPDB().open(holders[0].filename, profile=Profile.READ_ONLY_ANALYTICS, read_only=True)
+        settings = db.settings()
+        self.assertEqual(settings["journal_mode"], "wal")
+        self.assertEqual(settings["mmap_size"], 1024 * 1024 * 1024)
+        db.close()
+
+        with self.assertRaises(Exception):
+            OOPDB().open(holders[0].filename, page_size=1024)
+        with self.assertRaises(Exception):
+            OOPDB().open(holders[0].filename, journal_mode="WAL; DROP TABLE Test")
+
+    def test_in_memory(self):
+        temp_db = TempDB()
+        db = temp_db.db
+        snapshot_holder = TempFileHolder("temp_snapshot.db")
+
+        table_name = "TestTable"
+        int_column = ColumnConfig("Id", DataTypes.INTEGER, False)
+        add_table_to_db(db, table_name, [int_column], [[row_id] for row_id in range(100)])
+
+        memory_db = OOPDB().open_in_memory(temp_db.holder.filename)
+        self.assertEqual(memory_db.select_count(table_name).fetch()[0][0], 100)
+        memory_db.delete(table_name).where(Expression(int_column.name, Operation.GREATER_THAN_OR_EQUAL, 50)).execute()
+        # changes in memory don't affect the source
+        self.assertEqual(db.select_count(table_name).fetch()[0][0], 100)
+
+        self.assertTrue(memory_db.snapshot(snapshot_holder.filename, pages_per_step=1))
+        snapshot_db = OOPDB().open(snapshot_holder.filename)
+        self.assertEqual(snapshot_db.select_count(table_name).fetch()[0][0], 50)
+        snapshot_db.close()
+
+        with memory_db.transaction():
+            with self.assertRaises(Exception):
+                memory_db.snapshot(snapshot_holder.filename)
+        memory_db.close()
+
+        # missing source file isn't created
+        missing_path = "temp_missing.db"
+        self.assertEqual(len(OOPDB().open_in_memory(missing_path).schema.table_names()), 0)
+        self.assertFalse(os.path.exists(missing_path))
+
+    def test_snapshot_to_wal(self):
+        snapshot_holder = TempFileHolder("temp_snapshot.db")
+        wal_holders = [TempFileHolder("temp_snapshot.db-wal"), TempFileHolder("temp_snapshot.db-shm")]
+        table_name = "TestTable"
+        int_column = ColumnConfig("Id", DataTypes.INTEGER, False)
+
+        # target has not checkpointed frames in WAL
+        target_db = OOPDB().open(snapshot_holder.filename, profile=Profile.OLTP)
+        target_db.connection.execute("PRAGMA wal_autocheckpoint = 0")
+        add_table_to_db(target_db, table_name, [int_column], [[row_id] for row_id in range(11)])
+
+        memory_db = OOPDB().open_in_memory()
+        add_table_to_db(memory_db, table_name, [int_column], [[row_id] for row_id in range(20)])
+        self.assertTrue(memory_db.snapshot(snapshot_holder.filename, pages_per_step=1))
+        self.assertEqual(target_db.select_count(table_name).fetch()[0][0], 20)
+        snapshot_db = OOPDB().open(snapshot_holder.filename)
+        self.assertEqual(snapshot_db.select_count(table_name).fetch()[0][0], 20)
+        snapshot_db.close()
+        target_db.close()
+        memory_db.close()
+
+    def test_auto_snapshot(self):
+        snapshot_holder = TempFileHolder("temp_snapshot.db")
+        table_name = "TestTable"
+        int_column = ColumnConfig("Id", DataTypes.INTEGER, False)
+
+        db = OOPDB().open_in_memory()
+        db.enable_auto_snapshot(snapshot_holder.filename, interval=0)
+        add_table_to_db(db, table_name, [int_column], [[1]])
+        self.assertTrue(os.path.exists(snapshot_holder.filename))
+        with db.transaction():
+            db.insert_into(table_name, [int_column.name], [2]).execute()
+        snapshot_db = OOPDB().open(snapshot_holder.filename)
+        self.assertEqual(snapshot_db.select_count(table_name).fetch()[0][0], 1)
+
+        # long interval, the last snapshot is made on close
+        db.enable_auto_snapshot(snapshot_holder.filename, interval=3600)
+        db.insert_into(table_name, [int_column.name], [3]).execute()
+        self.assertEqual(snapshot_db.select_count(table_name).fetch()[0][0], 1)
+        snapshot_db.close()
+        db.close()
+        snapshot_db = OOPDB().open(snapshot_holder.filename)
+        self.assertEqual(snapshot_db.select_count(table_name).fetch()[0][0], 3)
+        snapshot_db.close()
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,123 @@
+from oopdb.OOPDBPool import OOPDBPool
+from oopdb.ColumnConfig import ColumnConfig, DataTypes
+from .test_oopdb import TempFileHolder
+import unittest
+import threading
+
+class TestOOPDBPool(unittest.TestCase):
+    def test_connections_reuse(self):
+        temp = TempFileHolder("temp_pool.db")
+        pool = OOPDBPool(temp.filename, size=2)
+        self.assertEqual(pool.idle_count, 0)
+        self.assertEqual(pool.busy_count, 0)
+
+        with pool.connection() as db:
+            self.assertEqual(pool.busy_count, 1)
+            with pool.connection() as same_db:
+                self.assertIs(db, same_db)
+                self.assertEqual(pool.busy_count, 1)
+            db.create_table("TestTable", [ColumnConfig("Id", DataTypes.INTEGER)]).execute()
+        self.assertEqual(pool.idle_count, 1)
+        self.assertEqual(pool.busy_count, 0)
+
+        with pool.connection() as other_db:
+            self.assertIs(db, other_db)
+            # not executed commands are discarded on return
+            other_db.insert_into("TestTable", ["Id"], [1])
+        with pool.connection() as other_db:
+            self.assertEqual(other_db.select_count("TestTable").fetch()[0][0], 0)
+            # transaction left open by the user, e.g. with not exited transaction context, is rolled back on return
+            other_db.cursor.execute("BEGIN")
+            other_db.transaction_depth = 1
+            other_db.insert_into("TestTable", ["Id"], [1]).execute()
+        with pool.connection() as other_db:
+            self.assertEqual(other_db.transaction_depth, 0)
+            self.assertFalse(other_db.connection.in_transaction)
+            self.assertEqual(other_db.select_count("TestTable").fetch()[0][0], 0)
+        pool.close()
+        self.assertEqual(pool.idle_count, 0)
+
+    def test_threads(self):
+        temp = TempFileHolder("temp_pool.db")
+        pool = OOPDBPool(temp.filename, size=3, timeout=10)
+        with pool.connection() as db:
+            db.create_table("TestTable", [ColumnConfig("Id", DataTypes.INTEGER)]).execute()
+
+        thread_cnt = 8
+        rows_per_thread = 50
+        barrier = threading.Barrier(3)
+        errors = []
+        def worker(thread_id : int) -> None:
+            try:
+                with pool.connection() as db:
+                    if thread_id < 3:
+                        # first threads hold all connections at once
+                        barrier.wait(timeout=10)
+                    with db.transaction("IMMEDIATE"):
+                        rows = [[thread_id * rows_per_thread + row_id] for row_id in range(rows_per_thread)]
+                        db.insert_many("TestTable", ["Id"], rows)
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=worker, args=(thread_id,)) for thread_id in range(thread_cnt)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertListEqual(errors, [])
+        self.assertEqual(pool.busy_count, 0)
+        self.assertEqual(pool.idle_count, 3)
+
+        with pool.connection() as db:
+            self.assertEqual(db.select_count("TestTable", "Id", distinct=True).fetch()[0][0], thread_cnt * rows_per_thread)
+        pool.close()
+
+    def test_timeout(self):
+        temp = TempFileHolder("temp_pool.db")
+        pool = OOPDBPool(temp.filename, size=1, timeout=0.01)
+        with pool.connection():
+            thread_errors = []
+            def worker():
+                try:
+                    with pool.connection():
+                        pass
+                except Exception as e:
+                    thread_errors.append(e)
+            thread = threading.Thread(target=worker)
+            thread.start()
+            thread.join()
+            self.assertEqual(len(thread_errors), 1)
+        pool.close()
+
+    def test_closed(self):
+        temp = TempFileHolder("temp_pool.db")
+        pool = OOPDBPool(temp.filename, size=1)
+        thread_errors = []
+        def worker():
+            try:
+                with pool.connection():
+                    pass
+            except Exception as e:
+                thread_errors.append(e)
+        with pool.connection():
+            # the thread waits for the busy connection without timeout and wakes up on close
+            thread = threading.Thread(target=worker)
+            thread.start()
+            thread.join(0.1)
+            self.assertTrue(thread.is_alive())
+            pool.close()
+            thread.join(2)
+            self.assertFalse(thread.is_alive())
+        self.assertEqual(len(thread_errors), 1)
+        self.assertEqual(pool.idle_count, 0)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join(2)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(len(thread_errors), 2)
+        with self.assertRaises(Exception):
+            with pool.connection():
+                pass
+
+if __name__ == "__main__":
+    unittest.main()
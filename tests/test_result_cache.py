@@ -0,0 +1,51 @@
+from oopdb.ResultCache import ResultCache
+import unittest
+
+class TestResultCache(unittest.TestCase):
+    def test_hits_and_misses(self):
+        cache = ResultCache()
+        self.assertIsNone(cache.get("query"))
+        cache.put("query", ["Table"], [(1,), (2,)])
+        self.assertListEqual(cache.get("query"), [(1,), (2,)])
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+
+        # returned list is a copy
+        cache.get("query").append((3,))
+        self.assertListEqual(cache.get("query"), [(1,), (2,)])
+
+    def test_lru_eviction(self):
+        cache = ResultCache(max_entries=2)
+        cache.put("first", ["Table"], [(1,)])
+        cache.put("second", ["Table"], [(2,)])
+        cache.get("first")
+        cache.put("third", ["Table"], [(3,)])
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("second"))
+        self.assertIsNotNone(cache.get("first"))
+        self.assertIsNotNone(cache.get("third"))
+
+    def test_bytes_limit(self):
+        cache = ResultCache(max_bytes=2000)
+        cache.put("big", ["Table"], [(row_id,) for row_id in range(1000)])
+        self.assertEqual(len(cache), 0)
+        cache.put("small", ["Table"], [(1,)])
+        self.assertEqual(len(cache), 1)
+        self.assertGreater(cache.size_bytes, 0)
+        self.assertLessEqual(cache.size_bytes, 2000)
+
+    def test_invalidate(self):
+        cache = ResultCache()
+        cache.put("first", ["First"], [(1,)])
+        cache.put("join", ["First", "Second"], [(1, 2)])
+        cache.put("second", ["second"], [(2,)])
+        cache.invalidate(["SECOND"])
+        self.assertIsNotNone(cache.get("first"))
+        self.assertIsNone(cache.get("join"))
+        self.assertIsNone(cache.get("second"))
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.size_bytes, 0)
+
+if __name__ == "__main__":
+    unittest.main()
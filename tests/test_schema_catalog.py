@@ -0,0 +1,68 @@
+from oopdb.OOPDB import OOPDB
+from oopdb.ColumnConfig import ColumnConfig, DataTypes, ForeignKey, PrimaryKey
+from .test_oopdb import TempFileHolder
+import sqlite3
+import unittest
+
+class TestSchemaCatalog(unittest.TestCase):
+    def test_columns(self):
+        holder = TempFileHolder("temp_schema.db")
+        db = OOPDB().open(holder.filename)
+        db.create_table("Tags", [PrimaryKey("Id"), ColumnConfig("Name", DataTypes.TEXT, False, is_unique=True)]).execute()
+        db.create_table("Relations", [ForeignKey("TagId", "Tags", "Id"), ColumnConfig("Weight", DataTypes.REAL),
+                                      ColumnConfig("Created", DataTypes.TIMESTAMP, is_indexed=True)]).execute()
+
+        self.assertListEqual(db.schema.table_names(), ["Tags", "Relations"])
+        self.assertListEqual(db.schema.column_names("Relations"), ["TagId", "Weight", "Created"])
+        self.assertListEqual(db.schema.column_names("Missing"), [])
+
+        primary_key = db.schema.primary_key("Tags")
+        self.assertIsInstance(primary_key, PrimaryKey)
+        self.assertEqual(str(primary_key), "Id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT")
+        name = db.schema.column("tags", "name")
+        self.assertEqual(name.type, DataTypes.TEXT)
+        self.assertFalse(name.is_null)
+        self.assertTrue(name.is_unique)
+
+        tag_id, weight, created = db.schema.columns("Relations")
+        self.assertIsInstance(tag_id, ForeignKey)
+        self.assertEqual(str(tag_id), "TagId INTEGER NOT NULL REFERENCES Tags(Id)")
+        self.assertTrue(tag_id.is_indexed)
+        self.assertEqual(weight.type, DataTypes.REAL)
+        self.assertFalse(weight.is_indexed)
+        self.assertTrue(created.is_indexed)
+        self.assertFalse(created.is_unique)
+        db.close()
+
+    def test_invalidation(self):
+        holder = TempFileHolder("temp_schema.db")
+        db = OOPDB().open(holder.filename)
+        db.create_table("First", [ColumnConfig("Value", DataTypes.INTEGER)]).execute()
+        self.assertListEqual(db.schema.table_names(), ["First"])
+        version = db.schema.schema_version
+
+        # schema is cached while it isn't changed
+        db.insert_into("First", ["Value"], [1]).execute()
+        db.schema.table_names()
+        self.assertEqual(db.schema.schema_version, version)
+
+        db.create_table("Second", [ColumnConfig("Value", DataTypes.INTEGER)]).execute()
+        self.assertListEqual(db.schema.table_names(), ["First", "Second"])
+
+        other = sqlite3.connect(holder.filename)
+        other.execute("ALTER TABLE Second ADD COLUMN Name TEXT")
+        other.commit()
+        other.close()
+        self.assertListEqual(db.schema.column_names("Second"), ["Value", "Name"])
+
+        # with staleness the version isn't checked until the time passes
+        db.schema.max_staleness = 60.0
+        db.schema.column_names("Second")
+        other = sqlite3.connect(holder.filename)
+        other.execute("DROP TABLE Second")
+        other.commit()
+        other.close()
+        self.assertTrue(db.schema.has_table("Second"))
+        db.schema.invalidate()
+        self.assertFalse(db.schema.has_table("Second"))
+        db.close()
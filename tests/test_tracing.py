@@ -0,0 +1,63 @@
+from oopdb.OOPDB import OOPDB
+from oopdb.ColumnConfig import ColumnConfig, DataTypes
+from oopdb.Expression import Expression, Operation
+from oopdb.Tracing import SlowQueryLogger, TraceEvent
+from .test_oopdb import TempFileHolder, add_table_to_db
+import logging
+import unittest
+
+class TestTracing(unittest.TestCase):
+    def test_trace_events(self):
+        holder = TempFileHolder("temp_tracing.db")
+        events = []
+        db = OOPDB()
+        db.set_tracer(events.append)
+        db.open(holder.filename)
+        add_table_to_db(db, "Words", [ColumnConfig("name", DataTypes.TEXT)], [["first"], ["second"], ["third"]])
+
+        events.clear()
+        rows = db.select("Words").where(Expression("name", Operation.NOT_EQUAL, "first")).fetch()
+        self.assertEqual(len(rows), 2)
+        timed = [event for event in events if event.duration is not None]
+        self.assertEqual(len(timed), 1)
+        self.assertEqual(timed[0].sql, "SELECT * FROM Words WHERE name <> ?")
+        self.assertEqual(timed[0].parameters_count, 1)
+        self.assertEqual(timed[0].rows_count, 2)
+        self.assertIn("test_tracing.py", timed[0].call_site)
+
+        events.clear()
+        self.assertEqual(len(list(db.select("Words").iter_rows(batch_size=2))), 3)
+        self.assertEqual(events[-1].rows_count, 3)
+
+        events.clear()
+        db.insert_many("Words", ["name"], [["fourth"], ["fifth"]])
+        insert_event = next(event for event in events if event.sql.startswith("INSERT"))
+        self.assertEqual(insert_event.parameters_count, 2)
+        self.assertEqual(insert_event.rows_count, 2)
+        # transaction statements are reported by sqlite trace callback without timing
+        self.assertTrue(any(event.sql.startswith("BEGIN") and event.duration is None for event in events))
+
+        events.clear()
+        db.select("Missing").fetch()
+        self.assertIsNotNone(events[-1].error)
+
+        db.set_tracer(None)
+        events.clear()
+        db.select("Words").fetch()
+        self.assertEqual(len(events), 0)
+        db.close()
+
+    def test_slow_query_logger(self):
+        logger = logging.getLogger("test_tracing")
+        slow_logger = SlowQueryLogger(threshold=0.5, logger=logger)
+        with self.assertLogs(logger, logging.WARNING) as logs:
+            slow_logger(TraceEvent("SELECT 1", 0, 1, 0.1, "file.py:1 in main"))
+            slow_logger(TraceEvent("BEGIN", 0, -1, None, "file.py:1 in main"))
+            slow_logger(TraceEvent("SELECT 2", 0, 1, 1.0, "file.py:2 in main"))
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn("SELECT 2", logs.output[0])
+        self.assertIn("file.py:2 in main", logs.output[0])
+
+        sampled_logger = SlowQueryLogger(threshold=0.5, sample_rate=0.0, logger=logger)
+        sampled_logger(TraceEvent("SELECT 2", 0, 1, 1.0, "file.py:2 in main"))
+        self.assertEqual(sampled_logger.slow_count, 1)